@@ -0,0 +1,93 @@
+"""
+Image Processing
+================
+Pillow/libvips work that the backend runs on CPU_EXECUTOR worker processes.
+
+Workers unpickle tasks by importing this module, so it deliberately imports
+nothing beyond the imaging libraries (no FastAPI, model clients or rembg).
+"""
+
+import os
+from functools import lru_cache
+from io import BytesIO
+
+from PIL import Image
+
+try:
+    import pyvips  # optional: faster resize + PNG encode in postprocess_image
+except (ImportError, OSError):  # OSError when the libvips shared library is missing
+    pyvips = None
+
+# zlib level for PNGs written to disk: 1 encodes several times faster than
+# Pillow's default of 6 for files ~20-30% larger
+PNG_COMPRESS_LEVEL = int(os.environ.get("PNG_COMPRESS_LEVEL", "1"))
+PNG_SAVE = {"compress_level": PNG_COMPRESS_LEVEL, "optimize": False}
+
+# Downscales of 4x or more box-reduce first, then filter the last >= 2x; about
+# 2.5x faster at 4096 -> 1024 (mean pixel difference ~0.2), no-op for upscales
+REDUCING_GAP = 2.0
+
+
+@lru_cache(maxsize=16)
+def parse_size(size: str) -> tuple[int, int]:
+    """Parse a "WxH" size string into integer (width, height)."""
+    w, h = size.split("x")
+    return int(w), int(h)
+
+
+def _postprocess_vips(file_path: str, width: int, height: int) -> None:
+    """libvips variant of postprocess_image: center-crop, resize and PNG encode."""
+    # thumbnail() shrinks on load and crops to fill the box, matching the PIL path
+    img = pyvips.Image.thumbnail(file_path, width, height=height, crop="centre", size="both")
+    if img.bands < 3:
+        img = img.colourspace("srgb")
+    tmp_path = file_path + ".tmp.png"
+    img.write_to_file(tmp_path, compression=PNG_COMPRESS_LEVEL)
+    os.replace(tmp_path, file_path)
+
+
+def postprocess_image(file_path: str, target_size: str) -> None:
+    """Convert to real PNG and resize/crop to match the requested dimensions."""
+    width, height = parse_size(target_size)
+    img = Image.open(file_path)
+    # Let JPEG payloads downscale during decode (no-op for other formats)
+    img.draft("RGB", (width, height))
+    # Already a correctly sized PNG — nothing to re-encode
+    if img.format == "PNG" and img.size == (width, height) and img.mode in ("RGB", "RGBA"):
+        return
+    if pyvips is not None:
+        img.close()
+        _postprocess_vips(file_path, width, height)
+        return
+    # Convert to RGB if needed (e.g. RGBA, palette)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    # Smart center-crop to target aspect ratio, folded into the resize as a box
+    box = (0, 0, img.width, img.height)
+    target_ratio = width / height
+    img_ratio = img.width / img.height
+    if abs(img_ratio - target_ratio) > 0.01:
+        if img_ratio > target_ratio:
+            # Image is wider than target — crop sides
+            new_w = int(img.height * target_ratio)
+            left = (img.width - new_w) // 2
+            box = (left, 0, left + new_w, img.height)
+        else:
+            # Image is taller than target — crop top/bottom
+            new_h = int(img.width / target_ratio)
+            top = (img.height - new_h) // 2
+            box = (0, top, img.width, top + new_h)
+    # Crop + resize to exact target dimensions in a single pass
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.LANCZOS, box=box, reducing_gap=REDUCING_GAP)
+    img.save(file_path, format="PNG", **PNG_SAVE)
+
+
+def transcode(path: str, fmt: str, quality: int) -> bytes:
+    """Re-encode an image file into another format and return the bytes."""
+    img = Image.open(path)
+    if fmt == "JPEG":
+        img = img.convert("RGB")
+    buf = BytesIO()
+    img.save(buf, format=fmt, quality=quality)
+    return buf.getvalue()
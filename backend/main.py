@@ -4,32 +4,55 @@ Image Creator Backend
 FastAPI backend for AI-powered image generation.
 """
 
-import json
 import uuid
+import hashlib
+import importlib.util
 import re
 import sys
 import os
 import base64
+import asyncio
+import multiprocessing
+import threading
+import shutil
+import struct
+import tempfile
+from bisect import bisect_right
+from collections import OrderedDict, deque
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import accumulate
+from typing import BinaryIO
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from io import BytesIO
 
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form
+import msgspec
+import numpy as np
+import orjson
+from fastapi import FastAPI, Header, HTTPException, Query, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
-from pydantic import BaseModel, Field
-from PIL import Image, ImageEnhance, ImageFilter, ImageDraw, ImageFont
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from PIL import Image, ImageEnhance, ImageFilter, ImageDraw, ImageFont, ImageStat
+
+try:
+    # optional: SIMD Lanczos for /api/upscale (cykooz.resizer >= 4)
+    from cykooz_resizer import FilterType, ResizeAlg, ResizeOptions, Resizer
+except ImportError:
+    Resizer = None
 
 # Add project root to path so we can import utils
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from utils.images import generate_image
+from utils.images import generate_image, generate_images
 from utils.images import edit_image
 from utils.chat import chat
 from utils.video import submit_video, check_video_status, download_video
 from utils.litellm_client import IMAGE_MODELS, VIDEO_MODELS
+from backend.imaging import PNG_SAVE, REDUCING_GAP, parse_size, postprocess_image, transcode
 
 # ---------------------------------------------------------------------------
 # Config
@@ -37,14 +60,22 @@ from utils.litellm_client import IMAGE_MODELS, VIDEO_MODELS
 
 IMAGES_DIR = Path(__file__).resolve().parent.parent / "generated-images"
 IMAGES_DIR.mkdir(parents=True, exist_ok=True)
-DB_PATH = IMAGES_DIR / "images_db.json"
+DB_PATH = IMAGES_DIR / "images_db.mpk"
 
 VIDEOS_DIR = Path(__file__).resolve().parent.parent / "generated-videos"
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
-VIDEOS_DB_PATH = VIDEOS_DIR / "videos_db.json"
+VIDEOS_DB_PATH = VIDEOS_DIR / "videos_db.mpk"
+
+COLLECTIONS_DB_PATH = IMAGES_DIR / "collections_db.mpk"
+PROMPTS_DB_PATH = IMAGES_DIR / "prompts_db.mpk"  # pre-log format, migrated on startup
+PROMPTS_LOG_PATH = IMAGES_DIR / "prompts_log.mpk"
 
-COLLECTIONS_DB_PATH = IMAGES_DIR / "collections_db.json"
-PROMPTS_DB_PATH = IMAGES_DIR / "prompts_db.json"
+# Throwaway files handed to provider APIs: RAM-backed /dev/shm when there is one
+SCRATCH_DIR = Path("/dev/shm") if os.path.isdir("/dev/shm") else Path(tempfile.gettempdir())
+
+# Set DB_DEBUG_JSON=1 to also write a pretty-printed *.debug.json copy of each
+# database on flush (msgpack files are not human-readable)
+DB_DEBUG_JSON = os.environ.get("DB_DEBUG_JSON", "") == "1"
 
 # ---------------------------------------------------------------------------
 # CORS — read sandbox metadata for allowed origins
@@ -52,8 +83,8 @@ PROMPTS_DB_PATH = IMAGES_DIR / "prompts_db.json"
 
 def get_allowed_origins():
     try:
-        with open("/dev/shm/sandbox_metadata.json") as f:
-            meta = json.load(f)
+        with open("/dev/shm/sandbox_metadata.json", "rb") as f:
+            meta = orjson.loads(f.read())
         sandbox_id = meta["thread_id"]
         stage = meta["environment"]
         base = f"{sandbox_id}.app.super.{stage}myninja.ai"
@@ -70,7 +101,42 @@ def get_allowed_origins():
 # App
 # ---------------------------------------------------------------------------
 
-app = FastAPI(title="Image Creator API", version="1.0.0")
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with orjson instead of the stdlib json encoder."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the stores, prompt history and rembg model on startup; flush on shutdown."""
+    global CPU_EXECUTOR
+    # forkserver, not fork: forking a process that already runs executor and
+    # flush threads can hand the worker a lock held by one of them
+    CPU_EXECUTOR = ProcessPoolExecutor(
+        max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("forkserver")
+    )
+    warm_dbs()
+    warm_prompt_history()
+    warm_rembg()
+    yield
+    flush_dbs()
+    flush_prompt_log()
+    CPU_EXECUTOR.shutdown()
+
+
+app = FastAPI(
+    title="Image Creator API",
+    version="1.0.0",
+    default_response_class=OrjsonResponse,
+    lifespan=lifespan,
+)
+
+# Route convention: handlers (and any future Depends) are ``async def`` with
+# plain typed parameters. FastAPI dispatches sync ``def`` handlers and
+# dependencies to the threadpool on every request, so keep them async and
+# send genuinely blocking work through run_blocking() instead.
 
 app.add_middleware(
     CORSMiddleware,
@@ -81,121 +147,584 @@ app.add_middleware(
 )
 
 # ---------------------------------------------------------------------------
-# Database helpers (JSON file)
+# Database helpers (MessagePack files)
 # ---------------------------------------------------------------------------
 
-def load_db() -> list[dict]:
-    if DB_PATH.exists():
-        return json.loads(DB_PATH.read_text())
+# Records are open-ended dicts (each feature adds its own keys), so decode
+# them as plain dicts rather than fixed Structs to avoid dropping fields.
+_DB_ENCODER = msgspec.msgpack.Encoder()
+_DB_DECODER = msgspec.msgpack.Decoder(list[dict])
+
+def _read_records(path: Path) -> list[dict]:
+    if path.exists():
+        return _DB_DECODER.decode(path.read_bytes())
     return []
 
-def save_db(records: list[dict]):
-    DB_PATH.write_text(json.dumps(records, indent=2))
+def _write_records(path: Path, records: list[dict]):
+    path.write_bytes(_DB_ENCODER.encode(records))
+
+def _migrate_legacy_json(path: Path):
+    """One-shot conversion of a pre-msgpack ``*.json`` database."""
+    legacy_path = path.with_suffix(".json")
+    if path.exists() or not legacy_path.exists():
+        return
+    _write_records(path, orjson.loads(legacy_path.read_bytes()))
+    print(f"[INFO] Migrated {legacy_path.name} -> {path.name}")
+
+# Length-prefixed msgpack frames, used by the append-only logs
+_FRAME_HEADER = struct.Struct(">I")
+
+def _frame(obj) -> bytes:
+    body = _DB_ENCODER.encode(obj)
+    return _FRAME_HEADER.pack(len(body)) + body
+
+def _read_frames(path: Path, decoder: msgspec.msgpack.Decoder) -> tuple[list, bool]:
+    """Decode every complete frame in ``path``; the flag is set if a torn tail was found."""
+    if not path.exists():
+        return [], False
+    data = path.read_bytes()
+    view = memoryview(data)
+    items = []
+    pos = 0
+    while pos + _FRAME_HEADER.size <= len(data):
+        (size,) = _FRAME_HEADER.unpack_from(data, pos)
+        start = pos + _FRAME_HEADER.size
+        if start + size > len(data):
+            break
+        items.append(decoder.decode(view[start:start + size]))
+        pos = start + size
+    return items, pos != len(data)
+
+DB_FLUSH_DELAY = 0.5  # seconds to coalesce writes before flushing to disk
+DB_FLUSH_RETRIES = 5  # failed flushes retry after DB_FLUSH_DELAY * 2**attempt
+DB_LOG_COMPACT_MIN = 256  # op-log frames tolerated before folding into the snapshot
+
+# Single writer thread so flushes of the same file never race each other
+_FLUSH_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-flush")
+
+# Op-log frames are [op, record]; replaying them is idempotent
+_OP_DECODER = msgspec.msgpack.Decoder(tuple[str, dict])
+
+
+class RecordStore:
+    """In-memory copy of a msgpack database with an id index and write-back flush.
+
+    On disk a store is a snapshot (``*.mpk``) plus an op log (``*.log``).
+    ``insert()``/``append()``/``update()``/``delete()`` touch one record and
+    only append that record to the log; ``save()`` replaces the whole list and
+    forces a snapshot. Writes are debounced onto the flush thread, and the log
+    is folded back into the snapshot once it outgrows the record count.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.log_path = path.with_suffix(".log")
+        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._records: list[dict] | None = None
+        self._by_id: dict[str, dict] = {}
+        self._pending_ops: list[bytes] = []
+        self._log_frames = 0
+        self._snapshot_needed = False
+        self._dirty = False
+        self._flush_scheduled = False
+
+    def load(self) -> list[dict]:
+        with self.lock:
+            if self._records is None:
+                self._records = _read_records(self.path)
+                self._reindex()
+                ops, _ = _read_frames(self.log_path, _OP_DECODER)
+                for op, record in ops:
+                    self._apply(op, record)
+                if ops or self.log_path.exists():
+                    # Fold the replayed log (and any torn tail) into a fresh snapshot
+                    self._reindex()
+                    self._snapshot_needed = True
+                    self.schedule_flush()
+            return self._records
+
+    def get(self, record_id: str) -> dict | None:
+        self.load()
+        return self._by_id.get(record_id)
+
+    def save(self, records: list[dict]):
+        with self.lock:
+            self._records = records
+            self._reindex()
+            self._snapshot_needed = True
+            self._pending_ops.clear()
+            self.schedule_flush()
+
+    def insert(self, record: dict):
+        """Add a record at the front (newest first)."""
+        self._write("insert", record)
+
+    def insert_many(self, records: list[dict]):
+        """Insert several records as one write, the last one ending up first."""
+        self._write_many("insert", records)
+
+    def append(self, record: dict):
+        """Add a record at the end."""
+        self._write("append", record)
+
+    def update(self, record: dict):
+        """Persist in-place changes made to a record returned by ``get()``."""
+        self._write("update", record)
+
+    def delete(self, record_id: str):
+        self._write("delete", {"id": record_id})
+
+    def flush(self):
+        # Flushes can come from the debounce thread and from the shutdown
+        # hook; serialize them so they never share the temp file
+        with self._write_lock:
+            with self.lock:
+                if not self._dirty:
+                    return
+                pending = len(self._pending_ops)
+                snapshot = self._snapshot_needed or (
+                    self._log_frames + pending > max(DB_LOG_COMPACT_MIN, len(self._records))
+                )
+                if snapshot:
+                    data = _DB_ENCODER.encode(self._records)
+                else:
+                    data = b"".join(self._pending_ops)
+                debug_data = orjson.dumps(self._records, option=orjson.OPT_INDENT_2) if DB_DEBUG_JSON else None
+                self._pending_ops.clear()
+                self._snapshot_needed = False
+                self._dirty = False
+            try:
+                if snapshot:
+                    tmp_path = self.path.with_suffix(".tmp")
+                    tmp_path.write_bytes(data)
+                    os.replace(tmp_path, self.path)
+                    self.log_path.unlink(missing_ok=True)
+                    self._log_frames = 0
+                else:
+                    with open(self.log_path, "ab") as f:
+                        f.write(data)
+                    self._log_frames += pending
+            except Exception:
+                # The queued ops are gone and the log may be torn: the next
+                # attempt must write a full snapshot
+                with self.lock:
+                    self._dirty = True
+                    self._snapshot_needed = True
+                    self._pending_ops.clear()
+                raise
+            if debug_data is not None:
+                self.path.with_suffix(".debug.json").write_bytes(debug_data)
+
+    def _write(self, op: str, record: dict):
+        self._write_many(op, (record,))
+
+    def _write_many(self, op: str, records):
+        # One lock and one view refresh however many records a batch carries
+        with self.lock:
+            self.load()
+            # Encode before touching the list so a record msgpack rejects
+            # leaves the store (and its views) exactly as they were
+            frames = [_frame([op, record]) for record in records]
+            all_new = True
+            for record in records:
+                all_new &= self._apply(op, record)
+            if not self._snapshot_needed:
+                self._pending_ops.extend(frames)
+            if op == "insert" and all_new:
+                self._extend_views(records)
+            else:
+                self._refresh_views()
+            self.schedule_flush()
+
+    def _apply(self, op: str, record: dict) -> bool:
+        """Apply one op to the list; existing ids are replaced so replays never duplicate.
+
+        Returns True if the op added a record that was not there before.
+        """
+        record_id = record.get("id")
+        existing = self._by_id.get(record_id)
+        if op == "delete":
+            if existing is not None:
+                self._records.remove(existing)
+                del self._by_id[record_id]
+        elif existing is not None:
+            if existing is not record:
+                existing.clear()
+                existing.update(record)
+        else:
+            if op == "append":
+                self._records.append(record)
+            else:
+                self._records.insert(0, record)
+            self._by_id[record_id] = record
+            return True
+        return False
+
+    def schedule_flush(self):
+        """Mark dirty and arm the debounce timer (no-op if one is already armed)."""
+        with self.lock:
+            self._dirty = True
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                self._arm_timer(DB_FLUSH_DELAY, 0)
+
+    def _arm_timer(self, delay: float, attempt: int):
+        # The timer only hands off to the flush thread, which never sleeps, so
+        # one store's debounce window never delays another store's write
+        timer = threading.Timer(delay, self._submit_flush, (attempt,))
+        timer.daemon = True
+        timer.start()
+
+    def _submit_flush(self, attempt: int):
+        try:
+            _FLUSH_EXECUTOR.submit(self._delayed_flush, attempt)
+        except RuntimeError:
+            pass  # interpreter shutting down; the shutdown hook flushes instead
 
-def load_videos_db() -> list[dict]:
-    if VIDEOS_DB_PATH.exists():
-        return json.loads(VIDEOS_DB_PATH.read_text())
-    return []
+    def _delayed_flush(self, attempt: int):
+        with self.lock:
+            self._flush_scheduled = False
+        try:
+            self.flush()
+        except Exception as e:
+            # Anything raised here would vanish inside the executor future; an
+            # encode error leaves the store dirty, so the retry starts over
+            print(f"[ERROR] Writing {self.path.name} failed (attempt {attempt + 1}): {e!r}")
+            if attempt + 1 < DB_FLUSH_RETRIES:
+                with self.lock:
+                    if not self._flush_scheduled:
+                        self._flush_scheduled = True
+                        self._arm_timer(DB_FLUSH_DELAY * 2 ** (attempt + 1), attempt + 1)
+
+    def _reindex(self):
+        self._by_id = {r["id"]: r for r in self._records if "id" in r}
+        self._refresh_views()
+
+    def _refresh_views(self):
+        """Hook for subclasses that derive read-side views from the records."""
+
+    def _extend_views(self, records: list[dict]):
+        """Hook for ``records`` just inserted at the front as new ids; defaults to a full refresh."""
+        self._refresh_views()
+
+
+class ImageStore(RecordStore):
+    """Gallery store that also keeps a prompt search blob and the favorites list.
+
+    Both are kept current on every write, so gallery reads never lowercase
+    prompts or rescan for favorites per request. They are laid out oldest
+    first, so inserting new records at the front of the gallery only appends
+    to them; other writes rebuild them.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._prompt_lower: dict[str, str] = {}
+        self._seq: dict[str, int] = {}  # id -> insertion rank, 0 = oldest
+        self._favorites: list[dict] = []
+        # Lowercase prompts, oldest first, joined by NUL; _offsets[k] is where
+        # the k-th oldest record (records[-1 - k]) starts
+        self._search_blob = ""
+        self._offsets: list[int] = []
+
+    def favorites(self) -> list[dict]:
+        self.load()
+        return self._favorites
+
+    def get_many(self, record_ids) -> list[dict]:
+        """Look up several ids at once, returned in gallery order; unknown ids are skipped."""
+        self.load()
+        found = [r for r in map(self._by_id.get, set(record_ids)) if r is not None]
+        found.sort(key=lambda r: -self._seq[r["id"]])
+        return found
+
+    def search(self, text: str) -> list[dict]:
+        """Case-insensitive prompt substring match, preserving gallery order."""
+        records = self.load()
+        blob, offsets = self._search_blob, self._offsets
+        needle = text.lower()
+        if not needle or "\0" in needle:
+            return []
+        # str.rfind scans the whole gallery in C, newest first; map each hit
+        # back to its record and resume before that record's start
+        matches = []
+        last = len(offsets) - 1
+        pos = blob.rfind(needle)
+        while pos != -1:
+            k = bisect_right(offsets, pos) - 1
+            matches.append(records[last - k])
+            if k == 0:
+                break
+            pos = blob.rfind(needle, 0, offsets[k] - 1)
+        return matches
+
+    def _refresh_views(self):
+        # Prompts never change after insert, so reuse already-lowered entries
+        prev = self._prompt_lower
+        self._prompt_lower = {
+            rid: prev[rid] if rid in prev else r.get("prompt", "").lower()
+            for rid, r in self._by_id.items()
+        }
+        lowered = [
+            self._prompt_lower.get(r.get("id")) or r.get("prompt", "").lower()
+            for r in reversed(self._records)
+        ]
+        self._offsets = list(accumulate((len(p) + 1 for p in lowered[:-1]), initial=0)) if lowered else []
+        self._search_blob = "\0".join(lowered)
+        self._seq = {r["id"]: k for k, r in enumerate(reversed(self._records)) if "id" in r}
+        self._favorites = [r for r in self._records if r.get("favorited", False)]
 
-def save_videos_db(records: list[dict]):
-    VIDEOS_DB_PATH.write_text(json.dumps(records, indent=2))
+    def _extend_views(self, records: list[dict]):
+        # Each inserted record is the new newest: append it to the oldest-first views
+        for r in records:
+            lowered = r.get("prompt", "").lower()
+            self._prompt_lower[r["id"]] = lowered
+            if self._offsets:
+                self._offsets.append(len(self._search_blob) + 1)
+                self._search_blob += "\0" + lowered
+            else:
+                self._offsets.append(0)
+                self._search_blob = lowered
+            self._seq[r["id"]] = len(self._offsets) - 1
+            if r.get("favorited", False):
+                self._favorites.insert(0, r)
+
+
+IMAGE_STORE = ImageStore(DB_PATH)
+VIDEO_STORE = RecordStore(VIDEOS_DB_PATH)
+COLLECTION_STORE = RecordStore(COLLECTIONS_DB_PATH)
+ALL_STORES = (IMAGE_STORE, VIDEO_STORE, COLLECTION_STORE)
+
+
+_ENTRY_DECODER = msgspec.msgpack.Decoder(dict)
+
+
+class PromptLog:
+    """Append-only log of length-prefixed msgpack frames, oldest entry first.
+
+    Saved prompts are buffered and appended in one write per ``DB_FLUSH_DELAY``
+    window on the flush thread; the file is only rewritten when it holds
+    ``COMPACT_FACTOR`` times more frames than are kept.
+    """
+
+    COMPACT_FACTOR = 4
+
+    def __init__(self, path: Path, legacy_path: Path, keep: int):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.keep = keep
+        self._frames = 0
+        self._lock = threading.Lock()
+        self._buffer: list[bytes] = []
+        self._flush_scheduled = False
+
+    def read(self) -> list[dict]:
+        """Return the newest ``keep`` entries, newest first."""
+        if not self.path.exists():
+            self._migrate()
+        entries, torn = _read_frames(self.path, _ENTRY_DECODER)
+        if torn:
+            # Drop a half-written trailing frame so later appends stay aligned
+            self._rewrite(entries)
+        self._frames = len(entries)
+        return entries[-self.keep:][::-1]
+
+    def append(self, entry: dict):
+        frame = _frame(entry)
+        with self._lock:
+            self._buffer.append(frame)
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                timer = threading.Timer(DB_FLUSH_DELAY, self._submit_drain)
+                timer.daemon = True
+                timer.start()
+
+    def clear(self):
+        with self._lock:
+            self._buffer.clear()
+        _FLUSH_EXECUTOR.submit(self._rewrite, [])
+
+    def flush(self):
+        """Block until buffered appends have reached disk."""
+        _FLUSH_EXECUTOR.submit(self._drain).result()
+
+    def _submit_drain(self):
+        try:
+            _FLUSH_EXECUTOR.submit(self._drain)
+        except RuntimeError:
+            pass  # interpreter shutting down; the shutdown hook flushes instead
+
+    def _drain(self):
+        with self._lock:
+            frames, self._buffer = self._buffer, []
+            self._flush_scheduled = False
+        if not frames:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(frames))
+        self._frames += len(frames)
+        if self._frames > self.COMPACT_FACTOR * self.keep:
+            entries, _ = _read_frames(self.path, _ENTRY_DECODER)
+            self._rewrite(entries[-self.keep:])
+
+    def _rewrite(self, entries: list[dict]):
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_bytes(b"".join(_frame(e) for e in entries))
+        os.replace(tmp_path, self.path)
+        self._frames = len(entries)
+
+    def _migrate(self):
+        _migrate_legacy_json(self.legacy_path)
+        legacy = _read_records(self.legacy_path)
+        if legacy:
+            # Legacy databases are stored newest first
+            self._rewrite(legacy[::-1])
+            print(f"[INFO] Migrated {self.legacy_path.name} -> {self.path.name}")
 
-def load_collections_db() -> list[dict]:
-    if COLLECTIONS_DB_PATH.exists():
-        return json.loads(COLLECTIONS_DB_PATH.read_text())
-    return []
 
-def save_collections_db(records: list[dict]):
-    COLLECTIONS_DB_PATH.write_text(json.dumps(records, indent=2))
+def load_db() -> list[dict]:
+    return IMAGE_STORE.load()
+
+def load_videos_db() -> list[dict]:
+    return VIDEO_STORE.load()
+
+def load_collections_db() -> list[dict]:
+    return COLLECTION_STORE.load()
 
 def load_prompts_db() -> list[dict]:
-    if PROMPTS_DB_PATH.exists():
-        return json.loads(PROMPTS_DB_PATH.read_text())
-    return []
+    return list(_prompt_history)
+
+def warm_dbs():
+    for store in ALL_STORES:
+        _migrate_legacy_json(store.path)
+        store.load()
+
+def flush_dbs():
+    """Persist every dirty store; runs at shutdown, the debounce timer covers the rest."""
+    for store in ALL_STORES:
+        try:
+            store.flush()
+        except Exception as e:
+            print(f"[ERROR] Writing {store.path.name} failed: {e!r}")
+            store.schedule_flush()
+
+PROMPT_HISTORY_SIZE = 50
+PROMPT_DEDUP_SECONDS = 300
+
+PROMPT_LOG = PromptLog(PROMPTS_LOG_PATH, PROMPTS_DB_PATH, keep=PROMPT_HISTORY_SIZE)
+
+# Newest-first history plus prompt -> last saved time, kept in sync with the
+# prompt log so dedup never has to reload or parse the file
+_prompt_history: deque[dict] = deque(maxlen=PROMPT_HISTORY_SIZE)
+_prompt_last_seen: dict[str, datetime] = {}
 
-def save_prompts_db(records: list[dict]):
-    PROMPTS_DB_PATH.write_text(json.dumps(records, indent=2))
+@lru_cache(maxsize=4 * PROMPT_HISTORY_SIZE)
+def _lower_prompt(prompt: str) -> str:
+    """Lowercased prompt for suggestion matching, computed once per distinct prompt."""
+    return prompt.lower()
+
+def warm_prompt_history():
+    _prompt_history.clear()
+    _prompt_history.extend(PROMPT_LOG.read())
+    _prompt_last_seen.clear()
+    for entry in reversed(_prompt_history):
+        try:
+            _prompt_last_seen[entry["prompt"]] = datetime.fromisoformat(entry["created_at"])
+        except Exception:
+            pass
 
 def save_prompt_history(prompt: str):
     """Auto-save prompt to history, dedup within 5 minutes."""
-    db = load_prompts_db()
     now = datetime.utcnow()
-    # Check for duplicate within last 5 minutes
-    for entry in db[:10]:
-        if entry["prompt"] == prompt:
-            try:
-                entry_time = datetime.fromisoformat(entry["created_at"])
-                if (now - entry_time).total_seconds() < 300:
-                    return  # Skip duplicate
-            except Exception:
-                pass
-    record = {"prompt": prompt, "created_at": now.isoformat()}
-    db.insert(0, record)
-    # Keep last 50
-    db = db[:50]
-    save_prompts_db(db)
+    last_seen = _prompt_last_seen.get(prompt)
+    if last_seen and (now - last_seen).total_seconds() < PROMPT_DEDUP_SECONDS:
+        return  # Skip duplicate
+    _prompt_last_seen[prompt] = now
+    if len(_prompt_last_seen) > 2 * PROMPT_HISTORY_SIZE:
+        for p, seen in list(_prompt_last_seen.items()):
+            if (now - seen).total_seconds() >= PROMPT_DEDUP_SECONDS:
+                del _prompt_last_seen[p]
+    entry = {"prompt": prompt, "created_at": now.isoformat()}
+    _prompt_history.appendleft(entry)
+    PROMPT_LOG.append(entry)
+
+def flush_prompt_log():
+    PROMPT_LOG.flush()
 
 # ---------------------------------------------------------------------------
 # Models
 # ---------------------------------------------------------------------------
 
-class GenerateRequest(BaseModel):
+class RequestModel(BaseModel):
+    """Base for request bodies: read-only after validation, only field names interned."""
+    model_config = ConfigDict(frozen=True, cache_strings="keys")
+
+
+class TextOverlay(RequestModel):
+    text: str = Field(..., min_length=1, max_length=200)
+    font_hint: str = Field(default="bold")
+    placement: str = Field(default="center")
+
+
+class GenerateRequest(RequestModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
     style: str = Field(default="none")
     size: str = Field(default="1024x1024")
     enhance: bool = Field(default=False)
     count: int = Field(default=1, ge=1, le=4)
-    text_overlay: dict | None = Field(default=None)
+    text_overlay: TextOverlay | None = Field(default=None)
 
-class EnhancePromptRequest(BaseModel):
+class EnhancePromptRequest(RequestModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
 
-class RefineRequest(BaseModel):
+class RefineRequest(RequestModel):
     image_id: str
     instruction: str = Field(..., min_length=1, max_length=2000)
 
-class CompareRequest(BaseModel):
+class CompareRequest(RequestModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
     style: str = Field(default="none")
     size: str = Field(default="1024x1024")
 
-class InpaintRequest(BaseModel):
+class InpaintRequest(RequestModel):
     image_id: str
-    mask: str  # base64-encoded PNG mask
+    mask: str = Field(..., max_length=16 * 1024 * 1024)  # base64-encoded PNG mask
     prompt: str = Field(..., min_length=1, max_length=2000)
 
-class UpscaleRequest(BaseModel):
+class UpscaleRequest(RequestModel):
     image_id: str
     scale: int = Field(default=2, ge=2, le=4)
+    algo: str = Field(default="lanczos")  # see UPSCALE_FILTERS
 
-class VideoGenerateRequest(BaseModel):
+class VideoGenerateRequest(RequestModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
     size: str = Field(default="1280x720")
     quality: str = Field(default="standard")  # standard or pro
 
-class ImageToVideoRequest(BaseModel):
+class ImageToVideoRequest(RequestModel):
     image_id: str
     prompt: str = Field(..., min_length=1, max_length=2000)
     quality: str = Field(default="standard")
 
-class AdjustRequest(BaseModel):
+class AdjustRequest(RequestModel):
     brightness: float = Field(default=1.0, ge=0.0, le=2.0)
     contrast: float = Field(default=1.0, ge=0.0, le=2.0)
     saturation: float = Field(default=1.0, ge=0.0, le=2.0)
     sharpness: float = Field(default=1.0, ge=0.0, le=2.0)
     blur: float = Field(default=0.0, ge=0.0, le=10.0)
 
-class CreateCollectionRequest(BaseModel):
+class CreateCollectionRequest(RequestModel):
     name: str = Field(..., min_length=1, max_length=200)
 
-class CollectionImageRequest(BaseModel):
+class CollectionImageRequest(RequestModel):
     image_id: str
 
-class CollectionItemRequest(BaseModel):
+class CollectionItemRequest(RequestModel):
     item_id: str
     item_type: str = Field(default="image")  # "image" or "video"
 
-class StyleTransferRequest(BaseModel):
+class StyleTransferRequest(RequestModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
     strength: float = Field(default=0.7, ge=0.0, le=1.0)
     size: str = Field(default="1024x1024")
@@ -203,12 +732,6 @@ class StyleTransferRequest(BaseModel):
 
 # Sprint 7 Models
 
-class TextOverlay(BaseModel):
-    text: str = Field(..., min_length=1, max_length=200)
-    font_hint: str = Field(default="bold")
-    placement: str = Field(default="center")
-
-
 # ---------------------------------------------------------------------------
 # Style presets
 # ---------------------------------------------------------------------------
@@ -224,36 +747,58 @@ STYLE_SUFFIXES = {
     "minimalist": ", minimalist, clean lines, simple shapes, modern design",
     "vintage": ", vintage, retro, film grain, muted colors, nostalgic",
 }
+# Interned once so every prompt build reuses the same suffix objects
+STYLE_SUFFIXES = {k: sys.intern(v) for k, v in STYLE_SUFFIXES.items()}
+
+
+@lru_cache(maxsize=1024)
+def _apply_style(prompt: str, style: str) -> str:
+    """Append the style preset suffix (memoized for repeated prompt/style pairs)."""
+    return prompt + STYLE_SUFFIXES.get(style, "")
+
 
 # ---------------------------------------------------------------------------
 # Image post-processing
 # ---------------------------------------------------------------------------
 
-def postprocess_image(file_path: str, target_size: str) -> None:
-    """Convert to real PNG and resize/crop to match the requested dimensions."""
-    width, height = map(int, target_size.split("x"))
-    img = Image.open(file_path)
-    # Convert to RGB if needed (e.g. RGBA, palette)
-    if img.mode not in ("RGB", "RGBA"):
-        img = img.convert("RGB")
-    # Smart center-crop to target aspect ratio, then resize
-    target_ratio = width / height
-    img_ratio = img.width / img.height
-    if abs(img_ratio - target_ratio) > 0.01:
-        if img_ratio > target_ratio:
-            # Image is wider than target — crop sides
-            new_w = int(img.height * target_ratio)
-            left = (img.width - new_w) // 2
-            img = img.crop((left, 0, left + new_w, img.height))
-        else:
-            # Image is taller than target — crop top/bottom
-            new_h = int(img.width / target_ratio)
-            top = (img.height - new_h) // 2
-            img = img.crop((0, top, img.width, top + new_h))
-    # Resize to exact target dimensions
-    if img.size != (width, height):
-        img = img.resize((width, height), Image.LANCZOS)
-    img.save(file_path, format="PNG")
+DECODED_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# (path, mtime_ns, mode) -> decoded image, least recently used first
+_decoded_cache: OrderedDict[tuple[str, int, str], Image.Image] = OrderedDict()
+_decoded_cache_bytes = 0
+_decoded_cache_lock = threading.Lock()
+
+
+def open_decoded(path: Path, mode: str) -> Image.Image:
+    """Decoded ``mode`` copy of an image file, shared across requests.
+
+    Repeated edits of the same parent skip the PNG decode and mode conversion.
+    The result is shared: callers must derive new images from it, never draw
+    on or paste into it.
+    """
+    global _decoded_cache_bytes
+    key = (str(path), path.stat().st_mtime_ns, mode)
+    with _decoded_cache_lock:
+        img = _decoded_cache.get(key)
+        if img is not None:
+            _decoded_cache.move_to_end(key)
+            return img
+
+    img = Image.open(path)
+    img = img.convert(mode) if img.mode != mode else img
+    img.load()
+    size = img.width * img.height * len(img.getbands())
+    if size > DECODED_CACHE_MAX_BYTES // 4:
+        return img  # too large to be worth evicting everything else for
+
+    with _decoded_cache_lock:
+        if key not in _decoded_cache:
+            _decoded_cache[key] = img
+            _decoded_cache_bytes += size
+            while _decoded_cache_bytes > DECODED_CACHE_MAX_BYTES:
+                _, old = _decoded_cache.popitem(last=False)
+                _decoded_cache_bytes -= old.width * old.height * len(old.getbands())
+    return img
 
 
 VALID_SIZES = ["1024x1024", "1024x1536", "1536x1024"]
@@ -263,30 +808,65 @@ VALID_VIDEO_SIZES = ["1280x720", "720x1280"]
 # Generation helpers
 # ---------------------------------------------------------------------------
 
+# Shared pool for blocking provider calls and PIL work awaited from async endpoints
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="blocking-io")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on IO_EXECUTOR without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(IO_EXECUTOR, partial(func, *args, **kwargs))
+
+
+def _fallback_orders(models: list[str]) -> dict[str | None, tuple[str, ...]]:
+    """Map each preferred model (or None) to the order models should be tried in."""
+    orders = {None: tuple(models)}
+    for m in models:
+        orders[m] = (m, *(x for x in models if x != m))
+    return orders
+
+
+# Model ordering is static, so fallback sequences are built once at import
+IMAGE_MODEL_ORDERS = _fallback_orders(IMAGE_MODELS)
+VIDEO_MODEL_ORDERS = _fallback_orders(VIDEO_MODELS)
+
+
+def _model_order(orders: dict[str | None, tuple[str, ...]], preferred: str | None) -> tuple[str, ...]:
+    """Fallback sequence starting with ``preferred``, even if it is not a listed model."""
+    order = orders.get(preferred)
+    if order is None:
+        order = (preferred, *orders[None])
+    return order
+
+
+def _first_success(models: tuple[str, ...], attempt):
+    """Call ``attempt(model)`` for each model in turn; return (model, result) of the first success.
+
+    Re-raises the last error if every model fails.
+    """
+    last_error: Exception = RuntimeError("No models configured")
+    for m in models:
+        try:
+            return m, attempt(m)
+        except Exception as e:
+            last_error = e
+    raise last_error
+
+
 def _generate_single(prompt: str, size: str, model: str | None = None) -> tuple[str, str]:
     """Generate one image with automatic fallback through available models."""
-    image_id = str(uuid.uuid4())
+    image_id = uuid.uuid4().hex
     filename = f"{image_id}.png"
     output_path = str(IMAGES_DIR / filename)
 
     # If a specific model is requested, try it first then fall back to others
-    models_to_try = list(IMAGE_MODELS)
-    if model and model in models_to_try:
-        models_to_try.remove(model)
-        models_to_try.insert(0, model)
-    elif model:
-        models_to_try.insert(0, model)
-
-    last_error = None
-    for m in models_to_try:
-        try:
-            generate_image(prompt=prompt, model=m, size=size, output=output_path)
-            break
-        except Exception as e:
-            last_error = e
-            continue
-    else:
-        raise RuntimeError(f"All image models failed. Last error: {last_error}")
+    try:
+        _first_success(
+            _model_order(IMAGE_MODEL_ORDERS, model),
+            lambda m: generate_image(prompt=prompt, model=m, size=size, output=output_path),
+        )
+    except Exception as e:
+        raise RuntimeError(f"All image models failed. Last error: {e}")
 
     try:
         postprocess_image(output_path, size)
@@ -294,24 +874,88 @@ def _generate_single(prompt: str, size: str, model: str | None = None) -> tuple[
         pass
     return image_id, filename
 
-def _build_prompt(prompt: str, style: str, enhance: bool) -> tuple[str, str | None]:
-    """Build final generation prompt with optional enhancement and style suffix."""
-    final_prompt = prompt
-    enhanced_prompt = None
-    if enhance:
+# Models whose generation endpoint honours n > 1 in a single request
+BATCH_IMAGE_MODELS = {"gpt-image"}
+
+
+def _generate_batch(prompt: str, size: str, count: int) -> list[tuple[str, str]]:
+    """Generate up to ``count`` images in one API call with the primary model.
+
+    Returns (image_id, filename) pairs; may return fewer (or none) if the
+    model cannot batch or the call fails, leaving the rest to _generate_single.
+    """
+    model = IMAGE_MODEL_ORDERS[None][0]
+    if count < 2 or model not in BATCH_IMAGE_MODELS:
+        return []
+    try:
+        paths = generate_images(
+            prompt=prompt,
+            model=model,
+            size=size,
+            n=count,
+            output_dir=str(IMAGES_DIR),
+            prefix=f"batch_{uuid.uuid4().hex}",
+        )
+    except Exception as e:
+        print(f"[ERROR] Batch generation failed, falling back to single calls: {e}")
+        return []
+
+    results = []
+    pending = []
+    for path in paths[:count]:
+        image_id = uuid.uuid4().hex
+        filename = f"{image_id}.png"
+        output_path = str(IMAGES_DIR / filename)
+        os.replace(path, output_path)
+        # Post-process the whole batch in parallel on the CPU pool
+        pending.append(CPU_EXECUTOR.submit(postprocess_image, output_path, size))
+        results.append((image_id, filename))
+    for future in pending:
         try:
-            enhanced_prompt = chat(
-                prompt,
-                model="claude-haiku",
-                system="You are an expert at writing image generation prompts. Enhance this prompt for better results while preserving the user's intent. Return only the enhanced prompt, nothing else.",
-                max_tokens=500,
-                temperature=0.7,
-            )
-            final_prompt = enhanced_prompt
+            future.result()
         except Exception:
             pass
-    style_suffix = STYLE_SUFFIXES.get(style, "")
-    return final_prompt + style_suffix, enhanced_prompt
+    return results
+
+
+ENHANCE_CACHE_SIZE = 1024
+
+# raw prompt -> claude-haiku enhancement, least recently used first. Reusing it
+# for a repeated prompt trades a fresh temperature-0.7 rewrite for skipping the
+# chat round trip; the image models still vary the result.
+_enhance_cache: OrderedDict[str, str] = OrderedDict()
+
+
+async def _enhance_for_generation(prompt: str) -> str | None:
+    """Enhanced prompt for generation, or None if the chat call fails (not cached)."""
+    enhanced = _enhance_cache.get(prompt)
+    if enhanced is not None:
+        _enhance_cache.move_to_end(prompt)
+        return enhanced
+
+    try:
+        enhanced = await run_blocking(
+            chat,
+            prompt,
+            model="claude-haiku",
+            system="You are an expert at writing image generation prompts. Enhance this prompt for better results while preserving the user's intent. Return only the enhanced prompt, nothing else.",
+            max_tokens=500,
+            temperature=0.7,
+        )
+    except Exception:
+        return None
+
+    _enhance_cache[prompt] = enhanced
+    if len(_enhance_cache) > ENHANCE_CACHE_SIZE:
+        _enhance_cache.popitem(last=False)
+    return enhanced
+
+
+async def _build_prompt(prompt: str, style: str, enhance: bool) -> tuple[str, str | None]:
+    """Build final generation prompt with optional enhancement and style suffix."""
+    enhanced_prompt = await _enhance_for_generation(prompt) if enhance else None
+    final_prompt = prompt if enhanced_prompt is None else enhanced_prompt
+    return _apply_style(final_prompt, style), enhanced_prompt
 
 # ---------------------------------------------------------------------------
 # Endpoints
@@ -327,11 +971,12 @@ async def generate(req: GenerateRequest):
     if req.size not in VALID_SIZES:
         raise HTTPException(400, f"Invalid size. Must be one of: {VALID_SIZES}")
 
-    generation_prompt, enhanced_prompt = _build_prompt(req.prompt, req.style, req.enhance)
+    generation_prompt, enhanced_prompt = await _build_prompt(req.prompt, req.style, req.enhance)
     # Sprint 7: apply character profile, text overlay, and brand kit
-    generation_prompt = _apply_text_overlay(generation_prompt, req.text_overlay)
+    text_overlay = req.text_overlay.model_dump() if req.text_overlay else None
+    generation_prompt = _apply_text_overlay(generation_prompt, text_overlay)
 
-    group_id = str(uuid.uuid4()) if req.count > 1 else None
+    group_id = uuid.uuid4().hex if req.count > 1 else None
     now = datetime.utcnow().isoformat()
 
     # Save prompt to history
@@ -340,7 +985,7 @@ async def generate(req: GenerateRequest):
     if req.count == 1:
         # Single image (backwards compatible)
         try:
-            image_id, filename = _generate_single(generation_prompt, req.size)
+            image_id, filename = await run_blocking(_generate_single, generation_prompt, req.size)
         except Exception as e:
             raise HTTPException(500, f"Image generation failed: {e}")
 
@@ -351,46 +996,45 @@ async def generate(req: GenerateRequest):
             "style": req.style,
             "size": req.size,
             "filename": filename,
-            "text_overlay": req.text_overlay,
+            "text_overlay": text_overlay,
             "created_at": now,
         }
-        db = load_db()
-        db.insert(0, record)
-        save_db(db)
+        IMAGE_STORE.insert(record)
         return record
     else:
-        # Batch: generate count images in parallel
+        # Batch: one multi-image call where supported, then fan out for the rest
         records = []
         errors = []
-        with ThreadPoolExecutor(max_workers=req.count) as executor:
-            futures = {
-                executor.submit(_generate_single, generation_prompt, req.size): i
-                for i in range(req.count)
-            }
-            for future in as_completed(futures):
-                try:
-                    image_id, filename = future.result()
-                    records.append({
-                        "id": image_id,
-                        "prompt": req.prompt,
-                        "enhanced_prompt": enhanced_prompt,
-                        "style": req.style,
-                        "size": req.size,
-                        "filename": filename,
-                        "group_id": group_id,
-                        "text_overlay": req.text_overlay,
-                        "created_at": now,
-                    })
-                except Exception as e:
-                    errors.append(str(e))
+        results = await run_blocking(_generate_batch, generation_prompt, req.size, req.count)
+        loop = asyncio.get_running_loop()
+        results += await asyncio.gather(
+            *(
+                loop.run_in_executor(IO_EXECUTOR, _generate_single, generation_prompt, req.size)
+                for _ in range(req.count - len(results))
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                errors.append(str(result))
+                continue
+            image_id, filename = result
+            records.append({
+                "id": image_id,
+                "prompt": req.prompt,
+                "enhanced_prompt": enhanced_prompt,
+                "style": req.style,
+                "size": req.size,
+                "filename": filename,
+                "group_id": group_id,
+                "text_overlay": text_overlay,
+                "created_at": now,
+            })
 
         if not records:
             raise HTTPException(500, f"All generations failed: {'; '.join(errors)}")
 
-        db = load_db()
-        for r in records:
-            db.insert(0, r)
-        save_db(db)
+        IMAGE_STORE.insert_many(records)
 
         return {"images": records, "group_id": group_id}
 
@@ -398,7 +1042,8 @@ async def generate(req: GenerateRequest):
 @app.post("/api/enhance-prompt")
 async def enhance_prompt(req: EnhancePromptRequest):
     try:
-        enhanced = chat(
+        enhanced = await run_blocking(
+            chat,
             req.prompt,
             model="claude-haiku",
             system="You are an expert at writing image generation prompts. Enhance this prompt for better, more detailed image generation results while preserving the user's intent. Return only the enhanced prompt, nothing else.",
@@ -417,13 +1062,13 @@ async def list_images(
     search: str = Query(default=None),
     favorites: bool = Query(default=False),
 ):
-    db = load_db()
-    filtered = db
     if search:
-        search_lower = search.lower()
-        filtered = [r for r in filtered if search_lower in r.get("prompt", "").lower()]
-    if favorites:
-        filtered = [r for r in filtered if r.get("favorited", False)]
+        filtered = IMAGE_STORE.search(search)
+        if favorites:
+            filtered = [r for r in filtered if r.get("favorited", False)]
+    else:
+        # Cached views: the unfiltered listing is just a slice
+        filtered = IMAGE_STORE.favorites() if favorites else load_db()
     start = (page - 1) * limit
     end = start + limit
     items = filtered[start:end]
@@ -437,54 +1082,96 @@ async def list_images(
 
 @app.get("/api/images/{image_id}")
 async def get_image(image_id: str):
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
+    record = IMAGE_STORE.get(image_id)
     if not record:
         raise HTTPException(404, "Image not found")
     return record
 
 
+# ---------------------------------------------------------------------------
+# Download transcoding (CPU-bound, runs in a process pool)
+# ---------------------------------------------------------------------------
+
+# Runs of characters stripped from prompts when building download filenames
+_SAFE_NAME_RE = re.compile(r'[^\w\s-]+')
+
+
+@lru_cache(maxsize=1024)
+def _safe_name(prompt_head: str) -> str:
+    """Filename-safe form of a prompt prefix (memoized: repeat downloads are free)."""
+    return _SAFE_NAME_RE.sub('', prompt_head).strip().replace(' ', '_')
+
+# format query value -> (PIL format, file extension, media type)
+DOWNLOAD_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "jpg": ("JPEG", "jpg", "image/jpeg"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+
+TRANSCODE_CACHE_SIZE = 128
+
+# Created by the lifespan handler
+CPU_EXECUTOR: ProcessPoolExecutor | None = None
+
+# (image_id, PIL format, mtime_ns) -> encoded bytes, least recently used first
+_transcode_cache: OrderedDict[tuple[str, str, int], bytes] = OrderedDict()
+
+
+async def _get_transcoded(image_id: str, file_path: Path, fmt: str, mtime_ns: int) -> bytes:
+    """Return the image re-encoded as ``fmt``, reusing cached results."""
+    key = (image_id, fmt, mtime_ns)
+    data = _transcode_cache.get(key)
+    if data is not None:
+        _transcode_cache.move_to_end(key)
+        return data
+
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(CPU_EXECUTOR, transcode, str(file_path), fmt, 90)
+    _transcode_cache[key] = data
+    if len(_transcode_cache) > TRANSCODE_CACHE_SIZE:
+        _transcode_cache.popitem(last=False)
+    return data
+
+
 @app.get("/api/images/{image_id}/download")
-async def download_image(image_id: str, format: str = Query(default="png")):
+async def download_image(
+    image_id: str,
+    format: str = Query(default="png"),
+    if_none_match: str | None = Header(default=None),
+):
     try:
-        db = load_db()
-        record = next((r for r in db if r["id"] == image_id), None)
+        record = IMAGE_STORE.get(image_id)
         if not record:
             raise HTTPException(404, "Image not found in database")
 
         file_path = IMAGES_DIR / record["filename"]
-        if not file_path.exists():
+        try:
+            st = file_path.stat()
+        except FileNotFoundError:
             print(f"[ERROR] Download failed: File not found at {file_path}")
             raise HTTPException(404, f"Image file not found on server: {record['filename']}")
 
+        # Same validator as /file; the format is part of the URL, so it can be shared
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
         # Generate safe filename
-        safe_name = re.sub(r'[^\w\s-]', '', record.get("prompt", "")[:50]).strip().replace(' ', '_') or image_id
+        safe_name = _safe_name(record.get("prompt", "")[:50]) or image_id
 
-        if format in ("jpeg", "jpg"):
-            try:
-                img = Image.open(file_path).convert("RGB")
-                buf = BytesIO()
-                img.save(buf, format="JPEG", quality=90)
-                buf.seek(0)
-                return StreamingResponse(buf, media_type="image/jpeg",
-                                         headers={"Content-Disposition": f'attachment; filename="{safe_name}.jpg"'})
-            except Exception as e:
-                print(f"[ERROR] JPEG conversion failed for {image_id}: {e}")
-                raise HTTPException(500, f"Failed to convert image to JPEG: {str(e)}")
-        elif format == "webp":
+        if format in DOWNLOAD_FORMATS:
+            fmt, ext, media_type = DOWNLOAD_FORMATS[format]
             try:
-                img = Image.open(file_path)
-                buf = BytesIO()
-                img.save(buf, format="WEBP", quality=90)
-                buf.seek(0)
-                return StreamingResponse(buf, media_type="image/webp",
-                                         headers={"Content-Disposition": f'attachment; filename="{safe_name}.webp"'})
+                data = await _get_transcoded(image_id, file_path, fmt, st.st_mtime_ns)
             except Exception as e:
-                print(f"[ERROR] WebP conversion failed for {image_id}: {e}")
-                raise HTTPException(500, f"Failed to convert image to WebP: {str(e)}")
+                print(f"[ERROR] {fmt} conversion failed for {image_id}: {e}")
+                raise HTTPException(500, f"Failed to convert image to {fmt}: {str(e)}")
+            return Response(content=data, media_type=media_type,
+                            headers={"Content-Disposition": f'attachment; filename="{safe_name}.{ext}"', "ETag": etag})
         else:
-            # PNG format - direct file response
-            return FileResponse(path=str(file_path), filename=f"{safe_name}.png", media_type="image/png")
+            # PNG format - direct file response, reusing the stat above
+            return FileResponse(path=str(file_path), filename=f"{safe_name}.png", media_type="image/png",
+                                headers={"ETag": etag}, stat_result=st)
     except HTTPException:
         raise
     except Exception as e:
@@ -492,19 +1179,54 @@ async def download_image(image_id: str, format: str = Query(default="png")):
         raise HTTPException(500, f"Download failed: {str(e)}")
 
 
+FILE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+FILE_CACHE_MAX_FILE_BYTES = 4 * 1024 * 1024  # larger files are streamed, not cached
+FILE_CACHE_CONTROL = "public, max-age=86400"
+
+# image_id -> (etag, png bytes), most recently used last
+_file_cache: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+_file_cache_bytes = 0
+
+
 @app.get("/api/images/{image_id}/file")
-async def serve_image_file(image_id: str):
+async def serve_image_file(image_id: str, if_none_match: str | None = Header(default=None)):
     """Serve the image file directly (for <img> tags)."""
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
+    global _file_cache_bytes
+    record = IMAGE_STORE.get(image_id)
     if not record:
         raise HTTPException(404, "Image not found")
 
     file_path = IMAGES_DIR / record["filename"]
-    if not file_path.exists():
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
         raise HTTPException(404, "Image file not found")
 
-    return FileResponse(path=str(file_path), media_type="image/png")
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": FILE_CACHE_CONTROL}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+
+    if st.st_size > FILE_CACHE_MAX_FILE_BYTES:
+        return FileResponse(path=str(file_path), media_type="image/png", headers=headers, stat_result=st)
+
+    cached = _file_cache.get(image_id)
+    if cached is not None and cached[0] == etag:
+        _file_cache.move_to_end(image_id)
+        data = cached[1]
+    else:
+        data = await run_blocking(file_path.read_bytes)
+        # Only the event loop touches the cache, so no lock is needed
+        stale = _file_cache.pop(image_id, None)
+        if stale is not None:
+            _file_cache_bytes -= len(stale[1])
+        _file_cache[image_id] = (etag, data)
+        _file_cache_bytes += len(data)
+        while _file_cache_bytes > FILE_CACHE_MAX_BYTES:
+            _, (_, old) = _file_cache.popitem(last=False)
+            _file_cache_bytes -= len(old)
+
+    return Response(content=data, media_type="image/png", headers=headers)
 
 
 # ---------------------------------------------------------------------------
@@ -513,14 +1235,14 @@ async def serve_image_file(image_id: str):
 
 @app.post("/api/refine")
 async def refine(req: RefineRequest):
-    db = load_db()
-    parent = next((r for r in db if r["id"] == req.image_id), None)
+    parent = IMAGE_STORE.get(req.image_id)
     if not parent:
         raise HTTPException(404, "Parent image not found")
 
     # Use claude-sonnet to merge original prompt + refinement instruction
     try:
-        merged_prompt = chat(
+        merged_prompt = await run_blocking(
+            chat,
             f"Original prompt: {parent['prompt']}\n\nRefinement instruction: {req.instruction}",
             model="claude-haiku",
             system="You are an image generation prompt expert. Given an original prompt and a refinement instruction, create a new prompt that incorporates the changes while preserving the original intent and style. Return only the new prompt, nothing else.",
@@ -531,11 +1253,10 @@ async def refine(req: RefineRequest):
         raise HTTPException(500, f"Prompt merging failed: {e}")
 
     # Apply style suffix from parent
-    style_suffix = STYLE_SUFFIXES.get(parent.get("style", "none"), "")
-    generation_prompt = merged_prompt + style_suffix
+    generation_prompt = _apply_style(merged_prompt, parent.get("style", "none"))
 
     try:
-        image_id, filename = _generate_single(generation_prompt, parent.get("size", "1024x1024"))
+        image_id, filename = await run_blocking(_generate_single, generation_prompt, parent.get("size", "1024x1024"))
     except Exception as e:
         raise HTTPException(500, f"Refinement generation failed: {e}")
 
@@ -550,9 +1271,7 @@ async def refine(req: RefineRequest):
         "filename": filename,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -562,49 +1281,50 @@ async def refine(req: RefineRequest):
 # ---------------------------------------------------------------------------
 
 @app.post("/api/compare")
-async def compare(req: CompareRequest):
+async def compare(req: CompareRequest, stream: bool = Query(default=False)):
+    """Generate with every image model; ``stream=true`` sends one NDJSON line per model as it lands."""
     if req.size not in VALID_SIZES:
         raise HTTPException(400, f"Invalid size. Must be one of: {VALID_SIZES}")
 
-    style_suffix = STYLE_SUFFIXES.get(req.style, "")
-    generation_prompt = req.prompt + style_suffix
+    generation_prompt = _apply_style(req.prompt, req.style)
     now = datetime.utcnow().isoformat()
-    comparison_id = str(uuid.uuid4())
+    comparison_id = uuid.uuid4().hex
 
-    results = []
-    records_to_save = []
-    with ThreadPoolExecutor(max_workers=len(IMAGE_MODELS)) as executor:
-        futures = {
-            executor.submit(_generate_single, generation_prompt, req.size, model): model
-            for model in IMAGE_MODELS
+    async def attempt(model: str) -> dict:
+        try:
+            image_id, filename = await run_blocking(_generate_single, generation_prompt, req.size, model)
+        except Exception as e:
+            return {"model": model, "image": None, "error": str(e)}
+        record = {
+            "id": image_id,
+            "prompt": req.prompt,
+            "style": req.style,
+            "size": req.size,
+            "filename": filename,
+            "model": model,
+            "comparison_id": comparison_id,
+            "created_at": now,
         }
-        for future in as_completed(futures):
-            model = futures[future]
-            try:
-                image_id, filename = future.result()
-                record = {
-                    "id": image_id,
-                    "prompt": req.prompt,
-                    "style": req.style,
-                    "size": req.size,
-                    "filename": filename,
-                    "model": model,
-                    "comparison_id": comparison_id,
-                    "created_at": now,
-                }
-                records_to_save.append(record)
-                results.append({"model": model, "image": record, "error": None})
-            except Exception as e:
-                results.append({"model": model, "image": None, "error": str(e)})
+        return {"model": model, "image": record, "error": None}
+
+    if stream:
+        async def lines():
+            # First finished model first, so the client never waits on the slowest one
+            for next_result in asyncio.as_completed([attempt(m) for m in IMAGE_MODELS]):
+                result = await next_result
+                if result["image"]:
+                    IMAGE_STORE.insert(result["image"])
+                yield orjson.dumps({**result, "comparison_id": comparison_id}) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
 
+    results = await asyncio.gather(*map(attempt, IMAGE_MODELS))
     if all(r["error"] for r in results):
         raise HTTPException(500, "Both models failed to generate images")
 
+    records_to_save = [r["image"] for r in results if r["image"]]
     if records_to_save:
-        db = load_db()
-        for r in records_to_save:
-            db.insert(0, r)
-        save_db(db)
+        IMAGE_STORE.insert_many(records_to_save)
 
     return {"results": results, "comparison_id": comparison_id}
 
@@ -613,6 +1333,45 @@ async def compare(req: CompareRequest):
 # Sprint 2: Image-to-Image Upload
 # ---------------------------------------------------------------------------
 
+def _save_reference(src: BinaryIO, ref_path: Path, size: str) -> None:
+    """Decode an uploaded reference image and store it as an RGBA PNG at ``size``."""
+    ref_img = Image.open(src)
+    # Let JPEG uploads downscale during decode (no-op for other formats)
+    ref_img.draft("RGB", parse_size(size))
+    if ref_img.mode != "RGBA":
+        ref_img = ref_img.convert("RGBA")
+    ref_img = ref_img.resize(parse_size(size), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    ref_img.save(str(ref_path), "PNG", **PNG_SAVE)
+
+
+def _render_from_reference(ref_path: Path, generation_prompt: str, size: str, output_path: str) -> None:
+    """Edit from the reference image, falling back to text-only generation."""
+    # Use the edit API with the reference image for context-aware generation
+    try:
+        edit_image(
+            image_path=str(ref_path),
+            prompt=generation_prompt,
+            mask_path=None,
+            model="gpt-image",
+            size=size,
+            output=output_path,
+        )
+    except Exception:
+        # Fallback: try text-only generation with model fallback
+        try:
+            _first_success(
+                IMAGE_MODEL_ORDERS[None],
+                lambda m: generate_image(prompt=generation_prompt, model=m, size=size, output=output_path),
+            )
+        except Exception as e:
+            raise HTTPException(500, f"Image generation failed: {e}")
+
+    try:
+        postprocess_image(output_path, size)
+    except Exception:
+        pass
+
+
 @app.post("/api/generate-from-image")
 async def generate_from_image(
     prompt: str = Form(..., min_length=1, max_length=2000),
@@ -628,38 +1387,29 @@ async def generate_from_image(
     if reference.content_type not in ("image/png", "image/jpeg"):
         raise HTTPException(400, "Reference image must be PNG or JPEG")
 
-    # Read and validate size (max 10MB)
-    ref_data = await reference.read()
-    if len(ref_data) > 10 * 1024 * 1024:
+    # Validate size (max 10MB) from the spooled upload before reading any of it
+    if reference.size > MAX_UPLOAD_BYTES:
         raise HTTPException(400, "Reference image must be under 10MB")
 
-    # Save reference image as PNG
-    ref_id = str(uuid.uuid4())
-    ref_filename = f"ref_{ref_id}.png"
-    ref_path = IMAGES_DIR / ref_filename
-    ref_img = Image.open(BytesIO(ref_data))
-    if ref_img.mode != "RGBA":
-        ref_img = ref_img.convert("RGBA")
-    target_w, target_h = map(int, size.split("x"))
-    ref_img = ref_img.resize((target_w, target_h), Image.LANCZOS)
-    ref_img.save(str(ref_path), "PNG")
-
-    # Build prompt with style
-    style_suffix = STYLE_SUFFIXES.get(style, "")
-
-    # Parse text_overlay if provided
+    # Validate text_overlay the way /api/generate does, before saving anything
     text_overlay_dict = None
     if text_overlay:
         try:
-            import json
-            text_overlay_dict = json.loads(text_overlay)
-        except Exception:
-            pass
+            text_overlay_dict = TextOverlay.model_validate_json(text_overlay).model_dump()
+        except ValueError:
+            raise HTTPException(400, "Invalid text_overlay")
+
+    # Save reference image as PNG, decoding straight from the spooled file
+    ref_id = uuid.uuid4().hex
+    ref_filename = f"ref_{ref_id}.png"
+    ref_path = IMAGES_DIR / ref_filename
+    await run_blocking(_save_reference, reference.file, ref_path, size)
 
     # Use Claude to analyze the reference image and build a rich prompt
     # that incorporates the visual details from the reference
     try:
-        description = chat(
+        description = await run_blocking(
+            chat,
             f"Describe this image in detail for an AI image generator. "
             f"Focus on: the main subject's appearance, clothing, setting, colors, "
             f"lighting, and composition. Be specific and concise (3-4 sentences).",
@@ -670,50 +1420,19 @@ async def generate_from_image(
         )
         generation_prompt = (
             f"Based on this reference image: {description}. "
-            f"Now apply this modification: {prompt}{style_suffix}"
+            f"Now apply this modification: {_apply_style(prompt, style)}"
         )
     except Exception:
-        generation_prompt = prompt + style_suffix
+        generation_prompt = _apply_style(prompt, style)
 
     # Apply text overlay to the generation prompt
     generation_prompt = _apply_text_overlay(generation_prompt, text_overlay_dict)
 
-    image_id = str(uuid.uuid4())
+    image_id = uuid.uuid4().hex
     filename = f"{image_id}.png"
     output_path = str(IMAGES_DIR / filename)
 
-    # Use the edit API with the reference image for context-aware generation
-    try:
-        edit_image(
-            image_path=str(ref_path),
-            prompt=generation_prompt,
-            mask_path=None,
-            model="gpt-image",
-            size=size,
-            output=output_path,
-        )
-    except Exception as edit_error:
-        # Fallback: try text-only generation with model fallback
-        last_error = edit_error
-        for m in IMAGE_MODELS:
-            try:
-                generate_image(
-                    prompt=generation_prompt,
-                    model=m,
-                    size=size,
-                    output=output_path,
-                )
-                break
-            except Exception as e:
-                last_error = e
-                continue
-        else:
-            raise HTTPException(500, f"Image generation failed: {last_error}")
-
-    try:
-        postprocess_image(output_path, size)
-    except Exception:
-        pass
+    await run_blocking(_render_from_reference, ref_path, generation_prompt, size, output_path)
 
     record = {
         "id": image_id,
@@ -725,9 +1444,7 @@ async def generate_from_image(
         "text_overlay": text_overlay_dict,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -736,42 +1453,30 @@ async def generate_from_image(
 # Sprint 3: Inpainting (mask + regenerate region)
 # ---------------------------------------------------------------------------
 
-@app.post("/api/inpaint")
-async def inpaint(req: InpaintRequest):
-    db = load_db()
-    parent = next((r for r in db if r["id"] == req.image_id), None)
-    if not parent:
-        raise HTTPException(404, "Parent image not found")
+# L-mode mask value -> edit API alpha: white (>128) = edit area → transparent
+MASK_ALPHA_LUT = [255] * 129 + [0] * 127
 
+
+def _decode_mask(src: BinaryIO) -> Image.Image:
+    """Decode a PNG mask file object into an L-mode image."""
+    return Image.open(src).convert("L")
+
+
+def _decode_mask_b64(data: str) -> Image.Image:
+    """Decode a base64 PNG mask; runs off the event loop since payloads reach several MB."""
+    return _decode_mask(BytesIO(base64.b64decode(data)))
+
+
+def _run_inpaint(parent: dict, mask_img: Image.Image, prompt: str) -> dict:
+    """Regenerate the masked region of ``parent`` and return the new record."""
     parent_path = IMAGES_DIR / parent["filename"]
     if not parent_path.exists():
         raise HTTPException(404, "Parent image file not found")
 
-    # Decode mask
-    try:
-        mask_data = base64.b64decode(req.mask)
-        mask_img = Image.open(BytesIO(mask_data)).convert("L")
-    except Exception:
-        raise HTTPException(400, "Invalid mask — must be base64-encoded PNG")
-
-    parent_img = Image.open(parent_path).convert("RGBA")
     parent_size = parent.get("size", "1024x1024")
 
-    # Convert the L-mode mask to an RGBA mask for the edit API:
-    # The edit API expects transparent (alpha=0) areas = regions to regenerate
-    # Our mask is L-mode: white (255) = edit area, black (0) = keep area
-    mask_resized = mask_img.resize(parent_img.size, Image.LANCZOS)
-    rgba_mask = Image.new("RGBA", parent_img.size, (0, 0, 0, 255))
-    mask_pixels = mask_resized.load()
-    rgba_pixels = rgba_mask.load()
-    if mask_pixels and rgba_pixels:
-        for y in range(parent_img.height):
-            for x in range(parent_img.width):
-                if mask_pixels[x, y] > 128:  # white = edit area → transparent
-                    rgba_pixels[x, y] = (0, 0, 0, 0)
-
     # Resize parent image to a valid generation size for the API
-    w, h = map(int, parent_size.split("x"))
+    w, h = parse_size(parent_size)
     if parent_size not in VALID_SIZES:
         # Pick closest valid size
         if w > h:
@@ -783,18 +1488,29 @@ async def inpaint(req: InpaintRequest):
     else:
         api_size = parent_size
 
-    # Save temp files for the edit API
-    temp_img_path = str(IMAGES_DIR / f"temp_inpaint_img_{uuid.uuid4()}.png")
-    temp_mask_path = str(IMAGES_DIR / f"temp_inpaint_mask_{uuid.uuid4()}.png")
-
-    api_w, api_h = map(int, api_size.split("x"))
-    parent_resized = parent_img.resize((api_w, api_h), Image.LANCZOS)
-    mask_for_api = rgba_mask.resize((api_w, api_h), Image.LANCZOS)
-
-    parent_resized.save(temp_img_path, "PNG")
-    mask_for_api.save(temp_mask_path, "PNG")
-
-    result_id = str(uuid.uuid4())
+    # Convert the L-mode mask to an RGBA mask for the edit API:
+    # The edit API expects transparent (alpha=0) areas = regions to regenerate
+    # Our mask is L-mode: white (255) = edit area, black (0) = keep area
+    api_w, api_h = parse_size(api_size)
+    mask_for_api = Image.new("RGBA", (api_w, api_h), (0, 0, 0, 0))
+    # Binary mask: bilinear is enough, the threshold after it restores hard edges
+    mask_for_api.putalpha(mask_img.resize((api_w, api_h), Image.BILINEAR, reducing_gap=REDUCING_GAP).point(MASK_ALPHA_LUT))
+
+    # Save temp files for the edit API; a parent that already is a PNG of the
+    # API size is sent as-is instead of being decoded and re-encoded
+    with Image.open(parent_path) as probe:
+        reuse_parent = probe.format == "PNG" and probe.size == (api_w, api_h)
+    if reuse_parent:
+        temp_img_path = None
+    else:
+        temp_img_path = str(SCRATCH_DIR / f"inpaint_img_{uuid.uuid4().hex}.png")
+        parent_img = open_decoded(parent_path, "RGBA").resize((api_w, api_h), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+        parent_img.save(temp_img_path, "PNG", **PNG_SAVE)
+    api_img_path = temp_img_path or str(parent_path)
+    temp_mask_path = str(SCRATCH_DIR / f"inpaint_mask_{uuid.uuid4().hex}.png")
+    mask_for_api.save(temp_mask_path, "PNG", **PNG_SAVE)
+
+    result_id = uuid.uuid4().hex
     result_filename = f"{result_id}.png"
     result_path = str(IMAGES_DIR / result_filename)
 
@@ -802,8 +1518,8 @@ async def inpaint(req: InpaintRequest):
         # Try gpt-image first for best inpainting quality
         try:
             edit_image(
-                image_path=temp_img_path,
-                prompt=req.prompt,
+                image_path=api_img_path,
+                prompt=prompt,
                 mask_path=temp_mask_path,
                 model="gpt-image",
                 size=api_size,
@@ -813,8 +1529,8 @@ async def inpaint(req: InpaintRequest):
             # Fallback: try gemini-image edit (without mask, prompt-based)
             try:
                 edit_image(
-                    image_path=temp_img_path,
-                    prompt=req.prompt,
+                    image_path=api_img_path,
+                    prompt=prompt,
                     mask_path=None,
                     model="gpt-image",
                     size=api_size,
@@ -823,7 +1539,7 @@ async def inpaint(req: InpaintRequest):
             except Exception:
                 # Last resort: regenerate with prompt context
                 generate_image(
-                    prompt=f"{req.prompt}. Seamlessly blend with the surrounding image context.",
+                    prompt=f"{prompt}. Seamlessly blend with the surrounding image context.",
                     model="gemini-image",
                     size=api_size,
                     output=result_path,
@@ -837,12 +1553,13 @@ async def inpaint(req: InpaintRequest):
         raise HTTPException(500, f"Inpainting failed: {e}")
     finally:
         # Clean up temp files
-        Path(temp_img_path).unlink(missing_ok=True)
+        if temp_img_path:
+            Path(temp_img_path).unlink(missing_ok=True)
         Path(temp_mask_path).unlink(missing_ok=True)
 
-    record = {
+    return {
         "id": result_id,
-        "prompt": req.prompt,
+        "prompt": prompt,
         "parent_id": parent["id"],
         "style": parent.get("style", "none"),
         "size": parent_size,
@@ -850,9 +1567,44 @@ async def inpaint(req: InpaintRequest):
         "inpainted": True,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+
+
+@app.post("/api/inpaint")
+async def inpaint(req: InpaintRequest):
+    parent = IMAGE_STORE.get(req.image_id)
+    if not parent:
+        raise HTTPException(404, "Parent image not found")
+
+    # Decode mask
+    try:
+        mask_img = await run_blocking(_decode_mask_b64, req.mask)
+    except Exception:
+        raise HTTPException(400, "Invalid mask — must be base64-encoded PNG")
+
+    record = await run_blocking(_run_inpaint, parent, mask_img, req.prompt)
+    IMAGE_STORE.insert(record)
+
+    return record
+
+
+@app.post("/api/inpaint/upload")
+async def inpaint_upload(
+    image_id: str = Form(...),
+    prompt: str = Form(..., min_length=1, max_length=2000),
+    mask: UploadFile = File(...),
+):
+    """Multipart variant of /api/inpaint that takes the mask as raw PNG bytes."""
+    parent = IMAGE_STORE.get(image_id)
+    if not parent:
+        raise HTTPException(404, "Parent image not found")
+
+    try:
+        mask_img = await run_blocking(_decode_mask, mask.file)
+    except Exception:
+        raise HTTPException(400, "Invalid mask — must be a PNG image")
+
+    record = await run_blocking(_run_inpaint, parent, mask_img, prompt)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -861,13 +1613,39 @@ async def inpaint(req: InpaintRequest):
 # Sprint 3: Image Upscaling (2x/4x)
 # ---------------------------------------------------------------------------
 
+# Quality/speed trade-off for upscaling: Lanczos is sharpest, bicubic about
+# 40% cheaper at 2x, nearest replicates pixels exactly (pixel art) at ~no cost
+UPSCALE_FILTERS = {
+    "lanczos": Image.LANCZOS,
+    "bicubic": Image.BICUBIC,
+    "nearest": Image.NEAREST,
+}
+
+
+def _upscale_file(src: Path, dst: Path, scale: int, algo: str = "lanczos") -> tuple[int, int]:
+    """Write an upscaled copy of ``src`` to ``dst`` and return its size."""
+    img = Image.open(src)
+    new_w = img.width * scale
+    new_h = img.height * scale
+    if algo == "lanczos" and Resizer is not None and img.mode in ("RGB", "RGBA", "L"):
+        # Same Lanczos3 kernel, vectorized (~6x faster than Pillow at 2x of 1024²);
+        # a Resizer per call since instances are not meant to be shared across threads
+        upscaled = Image.new(img.mode, (new_w, new_h))
+        Resizer().resize_pil(img, upscaled, ResizeOptions(resize_alg=ResizeAlg.convolution(FilterType.lanczos3)))
+    else:
+        upscaled = img.resize((new_w, new_h), UPSCALE_FILTERS[algo])
+    upscaled.save(str(dst), format="PNG", **PNG_SAVE)
+    return new_w, new_h
+
+
 @app.post("/api/upscale")
 async def upscale(req: UpscaleRequest):
     if req.scale not in (2, 4):
         raise HTTPException(400, "Scale must be 2 or 4")
+    if req.algo not in UPSCALE_FILTERS:
+        raise HTTPException(400, f"Algo must be one of: {list(UPSCALE_FILTERS)}")
 
-    db = load_db()
-    parent = next((r for r in db if r["id"] == req.image_id), None)
+    parent = IMAGE_STORE.get(req.image_id)
     if not parent:
         raise HTTPException(404, "Image not found")
 
@@ -875,14 +1653,9 @@ async def upscale(req: UpscaleRequest):
     if not file_path.exists():
         raise HTTPException(404, "Image file not found")
 
-    img = Image.open(file_path)
-    new_w = img.width * req.scale
-    new_h = img.height * req.scale
-    upscaled = img.resize((new_w, new_h), Image.LANCZOS)
-
-    new_id = str(uuid.uuid4())
+    new_id = uuid.uuid4().hex
     new_filename = f"{new_id}.png"
-    upscaled.save(str(IMAGES_DIR / new_filename), format="PNG")
+    new_w, new_h = await run_blocking(_upscale_file, file_path, IMAGES_DIR / new_filename, req.scale, req.algo)
 
     record = {
         "id": new_id,
@@ -893,11 +1666,10 @@ async def upscale(req: UpscaleRequest):
         "filename": new_filename,
         "upscaled": True,
         "upscale_factor": req.scale,
+        "upscale_algo": req.algo,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -908,13 +1680,12 @@ async def upscale(req: UpscaleRequest):
 
 @app.post("/api/images/{image_id}/favorite")
 async def toggle_favorite(image_id: str):
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
+    record = IMAGE_STORE.get(image_id)
     if not record:
         raise HTTPException(404, "Image not found")
 
     record["favorited"] = not record.get("favorited", False)
-    save_db(db)
+    IMAGE_STORE.update(record)
 
     return {"id": image_id, "favorited": record["favorited"]}
 
@@ -931,24 +1702,18 @@ async def generate_video_endpoint(req: VideoGenerateRequest):
         raise HTTPException(400, "Quality must be 'standard' or 'pro'")
 
     preferred = "sora" if req.quality == "standard" else "sora-pro"
-    models_to_try = [preferred] + [m for m in VIDEO_MODELS if m != preferred]
-    video_id_internal = str(uuid.uuid4())
+    video_id_internal = uuid.uuid4().hex
     now = datetime.utcnow().isoformat()
 
     # Submit async video generation with fallback
-    sora_video_id = None
-    used_model = None
-    last_error = None
-    for model in models_to_try:
-        try:
-            sora_video_id = submit_video(prompt=req.prompt, model=model, size=req.size, seconds=8)
-            used_model = model
-            break
-        except Exception as e:
-            last_error = e
-            continue
-    if not sora_video_id:
-        raise HTTPException(500, f"Video submission failed: {last_error}")
+    try:
+        used_model, sora_video_id = await run_blocking(
+            _first_success,
+            _model_order(VIDEO_MODEL_ORDERS, preferred),
+            lambda m: submit_video(prompt=req.prompt, model=m, size=req.size, seconds=8),
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Video submission failed: {e}")
 
     record = {
         "id": video_id_internal,
@@ -962,27 +1727,23 @@ async def generate_video_endpoint(req: VideoGenerateRequest):
         "filename": None,
         "created_at": now,
     }
-    db = load_videos_db()
-    db.insert(0, record)
-    save_videos_db(db)
+    VIDEO_STORE.insert(record)
 
     return record
 
 
-@app.get("/api/videos/{video_id}/status")
-async def video_status(video_id: str):
-    db = load_videos_db()
-    record = next((r for r in db if r["id"] == video_id), None)
-    if not record:
-        raise HTTPException(404, "Video not found")
+VIDEO_STATUS_BATCH_MAX = 50
+VIDEO_STATUS_CONCURRENCY = 8  # upstream status checks in flight per batch request
+
+# video_id -> in-flight refresh, so overlapping polls share one upstream call
+_video_refreshes: dict[str, asyncio.Future] = {}
 
-    # If already completed or failed, return cached status
-    if record["status"] in ("completed", "failed"):
-        return record
 
-    # Poll the upstream API
+async def _refresh_video(record: dict) -> dict:
+    """Poll the upstream API for a pending video and download it once completed."""
+    video_id = record["id"]
     try:
-        info = check_video_status(record["sora_video_id"])
+        info = await run_blocking(check_video_status, record["sora_video_id"])
         record["status"] = info.get("status", record["status"])
         record["progress"] = info.get("progress", record["progress"])
 
@@ -990,7 +1751,7 @@ async def video_status(video_id: str):
             # Download the video
             filename = f"{video_id}.mp4"
             output_path = str(VIDEOS_DIR / filename)
-            download_video(record["sora_video_id"], output=output_path)
+            await run_blocking(download_video, record["sora_video_id"], output=output_path)
             record["filename"] = filename
 
         elif record["status"] == "failed":
@@ -1000,27 +1761,74 @@ async def video_status(video_id: str):
             else:
                 record["error"] = str(raw_error) if raw_error else "Unknown error"
 
-        save_videos_db(db)
+        VIDEO_STORE.update(record)
     except Exception as e:
         record["error"] = str(e)
 
     return record
 
 
+async def _current_video_status(record: dict) -> dict:
+    # If already completed or failed, return cached status
+    if record["status"] in ("completed", "failed"):
+        return record
+
+    pending = _video_refreshes.get(record["id"])
+    if pending is None:
+        pending = asyncio.ensure_future(_refresh_video(record))
+        _video_refreshes[record["id"]] = pending
+        pending.add_done_callback(lambda _: _video_refreshes.pop(record["id"], None))
+    return await asyncio.shield(pending)
+
+
+@app.get("/api/videos/status")
+async def video_status_batch(ids: list[str] = Query(..., min_length=1)):
+    """Status of several videos at once; upstream checks run concurrently."""
+    if len(ids) > VIDEO_STATUS_BATCH_MAX:
+        raise HTTPException(400, f"At most {VIDEO_STATUS_BATCH_MAX} ids per request")
+
+    records = [r for r in map(VIDEO_STORE.get, dict.fromkeys(ids)) if r is not None]
+    limit = asyncio.Semaphore(VIDEO_STATUS_CONCURRENCY)
+
+    async def status(record: dict) -> dict:
+        async with limit:
+            return await _current_video_status(record)
+
+    videos = await asyncio.gather(*map(status, records))
+    return {"videos": videos}
+
+
+@app.get("/api/videos/{video_id}/status")
+async def video_status(video_id: str):
+    record = VIDEO_STORE.get(video_id)
+    if not record:
+        raise HTTPException(404, "Video not found")
+
+    return await _current_video_status(record)
+
+
+class VideoFileResponse(FileResponse):
+    """FileResponse that streams in 1 MiB reads instead of 64 KiB."""
+    chunk_size = 1 << 20
+
+
 @app.get("/api/videos/{video_id}/file")
 async def serve_video_file(video_id: str):
-    db = load_videos_db()
-    record = next((r for r in db if r["id"] == video_id), None)
+    record = VIDEO_STORE.get(video_id)
     if not record:
         raise HTTPException(404, "Video not found")
     if not record.get("filename"):
         raise HTTPException(400, "Video not yet completed")
 
     file_path = VIDEOS_DIR / record["filename"]
-    if not file_path.exists():
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
         raise HTTPException(404, "Video file not found")
 
-    return FileResponse(path=str(file_path), media_type="video/mp4")
+    # Starlette answers Range requests itself (players seek without refetching)
+    # and hands the path to servers that support the ASGI pathsend extension
+    return VideoFileResponse(path=str(file_path), media_type="video/mp4", stat_result=st)
 
 
 @app.get("/api/videos")
@@ -1036,14 +1844,23 @@ async def list_videos(page: int = 1, limit: int = 20):
 # Sprint 4: Image-to-Video (#69)
 # ---------------------------------------------------------------------------
 
+def _resize_to_png(src: Path, size: tuple[int, int]) -> bytes:
+    """Return an RGB copy of ``src`` resized to ``size`` as PNG bytes."""
+    img = open_decoded(src, "RGB")
+    if img.size != size:
+        img = img.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    buf = BytesIO()
+    img.save(buf, "PNG", **PNG_SAVE)
+    return buf.getvalue()
+
+
 @app.post("/api/image-to-video")
 async def image_to_video(req: ImageToVideoRequest):
     if req.quality not in ("standard", "pro"):
         raise HTTPException(400, "Quality must be 'standard' or 'pro'")
 
     # Find the parent image
-    img_db = load_db()
-    parent = next((r for r in img_db if r["id"] == req.image_id), None)
+    parent = IMAGE_STORE.get(req.image_id)
     if not parent:
         raise HTTPException(404, "Image not found")
 
@@ -1053,46 +1870,34 @@ async def image_to_video(req: ImageToVideoRequest):
 
     # Determine video size based on source image aspect ratio
     parent_size = parent.get("size", "1024x1024")
-    w, h = map(int, parent_size.split("x"))
+    w, h = parse_size(parent_size)
     video_size = "720x1280" if h > w else "1280x720"
 
     preferred = "sora" if req.quality == "standard" else "sora-pro"
-    models_to_try = [preferred] + [m for m in VIDEO_MODELS if m != preferred]
-    video_id_internal = str(uuid.uuid4())
+    video_id_internal = uuid.uuid4().hex
     now = datetime.utcnow().isoformat()
 
     # Resize source image to match video dimensions (required by Sora API)
-    video_w, video_h = map(int, video_size.split("x"))
-    resized_path = IMAGES_DIR / f"temp_video_{req.image_id}.png"
-    img = Image.open(parent_path).convert("RGB")
-    img_resized = img.resize((video_w, video_h), Image.LANCZOS)
-    img_resized.save(resized_path, "PNG")
+    video_w, video_h = parse_size(video_size)
+    resized_png = await run_blocking(_resize_to_png, parent_path, (video_w, video_h))
 
     # Send the actual source image via input_reference for image-to-video
     # No need to prepend parent prompt — the image itself is sent as reference
     motion_prompt = req.prompt
-    sora_video_id = None
-    used_model = None
-    last_error = None
-    for model in models_to_try:
-        try:
-            sora_video_id = submit_video(
+    try:
+        used_model, sora_video_id = await run_blocking(
+            _first_success,
+            _model_order(VIDEO_MODEL_ORDERS, preferred),
+            lambda m: submit_video(
                 prompt=motion_prompt,
-                model=model,
+                model=m,
                 size=video_size,
                 seconds=8,
-                image_path=str(resized_path),
-            )
-            used_model = model
-            break
-        except Exception as e:
-            last_error = e
-            continue
-    # Clean up temp resized image
-    resized_path.unlink(missing_ok=True)
-
-    if not sora_video_id:
-        raise HTTPException(500, f"Video submission failed: {last_error}")
+                image_bytes=resized_png,
+            ),
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Video submission failed: {e}")
 
     record = {
         "id": video_id_internal,
@@ -1107,9 +1912,7 @@ async def image_to_video(req: ImageToVideoRequest):
         "filename": None,
         "created_at": now,
     }
-    db = load_videos_db()
-    db.insert(0, record)
-    save_videos_db(db)
+    VIDEO_STORE.insert(record)
 
     return record
 
@@ -1118,24 +1921,44 @@ async def image_to_video(req: ImageToVideoRequest):
 # Sprint 4: Image Filters and Adjustments (#71)
 # ---------------------------------------------------------------------------
 
-@app.post("/api/images/{image_id}/adjust")
-async def adjust_image(image_id: str, req: AdjustRequest):
-    db = load_db()
-    parent = next((r for r in db if r["id"] == image_id), None)
-    if not parent:
-        raise HTTPException(404, "Image not found")
+def _blend_lut(base: int, levels: np.ndarray, alpha: float) -> np.ndarray:
+    """Image.blend of a constant ``base`` toward ``levels``, per level.
+
+    float32 and truncation match Pillow's C blend loop bit for bit.
+    """
+    base = np.float32(base)
+    return np.clip(base + np.float32(alpha) * (levels.astype(np.float32) - base), 0, 255).astype(np.uint8)
+
+
+def _tone_lut(img: Image.Image, brightness: float, contrast: float) -> list[int]:
+    """One per-channel LUT equal to ImageEnhance Brightness followed by Contrast."""
+    lut = np.arange(256, dtype=np.uint8)
+    if brightness != 1.0:
+        lut = _blend_lut(0, lut, brightness)
+    if contrast != 1.0:
+        # Contrast blends toward the mean luma of its (already brightened) input
+        src = img.point(lut.tolist() * 3) if brightness != 1.0 else img
+        mean = int(ImageStat.Stat(src.convert("L")).mean[0] + 0.5)
+        lut = _blend_lut(mean, lut, contrast)
+    return lut.tolist() * 3
 
-    file_path = IMAGES_DIR / parent["filename"]
-    if not file_path.exists():
-        raise HTTPException(404, "Image file not found")
 
-    img = Image.open(file_path).convert("RGB")
+def _share_file(src: Path, dst: Path) -> None:
+    """Hardlink ``src`` to ``dst``, copying when the filesystem can't link."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
 
-    # Apply adjustments in order: brightness → contrast → saturation → sharpness → blur
-    if req.brightness != 1.0:
-        img = ImageEnhance.Brightness(img).enhance(req.brightness)
-    if req.contrast != 1.0:
-        img = ImageEnhance.Contrast(img).enhance(req.contrast)
+def _adjust_file(src: Path, dst: Path, req: AdjustRequest) -> None:
+    """Apply the requested adjustments to ``src`` and save the result to ``dst``."""
+    img = open_decoded(src, "RGB")
+
+    # Apply adjustments in order: brightness → contrast → saturation → sharpness → blur.
+    # The first two are per-channel blends, so they fold into a single point() pass
+    if req.brightness != 1.0 or req.contrast != 1.0:
+        img = img.point(_tone_lut(img, req.brightness, req.contrast))
     if req.saturation != 1.0:
         img = ImageEnhance.Color(img).enhance(req.saturation)
     if req.sharpness != 1.0:
@@ -1143,9 +1966,29 @@ async def adjust_image(image_id: str, req: AdjustRequest):
     if req.blur > 0:
         img = img.filter(ImageFilter.GaussianBlur(radius=req.blur))
 
-    new_id = str(uuid.uuid4())
-    new_filename = f"{new_id}.png"
-    img.save(str(IMAGES_DIR / new_filename), format="PNG")
+    # PNG compression costs far more than the enhance passes
+    img.save(str(dst), format="PNG", **PNG_SAVE)
+
+
+@app.post("/api/images/{image_id}/adjust")
+async def adjust_image(image_id: str, req: AdjustRequest):
+    parent = IMAGE_STORE.get(image_id)
+    if not parent:
+        raise HTTPException(404, "Image not found")
+
+    file_path = IMAGES_DIR / parent["filename"]
+    if not file_path.exists():
+        raise HTTPException(404, "Image file not found")
+
+    new_id = uuid.uuid4().hex
+    if (req.brightness == 1.0 and req.contrast == 1.0 and req.saturation == 1.0
+            and req.sharpness == 1.0 and req.blur == 0):
+        # Identity sliders: share the parent's bytes instead of a decode/encode round trip
+        new_filename = f"{new_id}{file_path.suffix}"
+        await run_blocking(_share_file, file_path, IMAGES_DIR / new_filename)
+    else:
+        new_filename = f"{new_id}.png"
+        await run_blocking(_adjust_file, file_path, IMAGES_DIR / new_filename, req)
 
     record = {
         "id": new_id,
@@ -1164,9 +2007,7 @@ async def adjust_image(image_id: str, req: AdjustRequest):
         },
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -1177,16 +2018,14 @@ async def adjust_image(image_id: str, req: AdjustRequest):
 
 @app.post("/api/collections")
 async def create_collection(req: CreateCollectionRequest):
-    collection_id = str(uuid.uuid4())
+    collection_id = uuid.uuid4().hex
     record = {
         "id": collection_id,
         "name": req.name,
         "image_ids": [],
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_collections_db()
-    db.insert(0, record)
-    save_collections_db(db)
+    COLLECTION_STORE.insert(record)
     return record
 
 
@@ -1202,48 +2041,43 @@ async def list_collections():
 
 @app.get("/api/collections/{collection_id}")
 async def get_collection(collection_id: str):
-    db = load_collections_db()
-    collection = next((c for c in db if c["id"] == collection_id), None)
+    collection = COLLECTION_STORE.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection not found")
 
     # Load full image records for this collection
-    img_db = load_db()
-    images = [r for r in img_db if r["id"] in collection.get("image_ids", [])]
+    images = IMAGE_STORE.get_many(collection.get("image_ids", []))
 
     return {**collection, "images": images, "image_count": len(images)}
 
 
 @app.post("/api/collections/{collection_id}/images")
 async def add_image_to_collection(collection_id: str, req: CollectionImageRequest):
-    db = load_collections_db()
-    collection = next((c for c in db if c["id"] == collection_id), None)
+    collection = COLLECTION_STORE.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection not found")
 
     # Verify image exists
-    img_db = load_db()
-    image = next((r for r in img_db if r["id"] == req.image_id), None)
+    image = IMAGE_STORE.get(req.image_id)
     if not image:
         raise HTTPException(404, "Image not found")
 
     if req.image_id not in collection.get("image_ids", []):
         collection.setdefault("image_ids", []).append(req.image_id)
-        save_collections_db(db)
+        COLLECTION_STORE.update(collection)
 
     return {"collection_id": collection_id, "image_id": req.image_id, "added": True}
 
 
 @app.delete("/api/collections/{collection_id}/images/{image_id}")
 async def remove_image_from_collection(collection_id: str, image_id: str):
-    db = load_collections_db()
-    collection = next((c for c in db if c["id"] == collection_id), None)
+    collection = COLLECTION_STORE.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection not found")
 
     if image_id in collection.get("image_ids", []):
         collection["image_ids"].remove(image_id)
-        save_collections_db(db)
+        COLLECTION_STORE.update(collection)
 
     return {"collection_id": collection_id, "image_id": image_id, "removed": True}
 
@@ -1252,10 +2086,45 @@ async def remove_image_from_collection(collection_id: str, image_id: str):
 # Sprint 5: Background Removal (#77)
 # ---------------------------------------------------------------------------
 
+REMBG_MODEL = os.environ.get("REMBG_MODEL", "u2net")
+# Checked without importing: rembg pulls in onnxruntime, and CPU_EXECUTOR
+# workers import this module
+REMBG_AVAILABLE = importlib.util.find_spec("rembg") is not None
+
+# (rembg.remove, session) once the model is loaded
+_rembg: tuple | None = None
+_rembg_lock = threading.Lock()
+
+
+def _rembg_session():
+    """Import rembg and load the background-removal model once; rembg reloads it per call otherwise.
+
+    The lock keeps a request that races the startup warm-up from loading a
+    second copy of the model. onnxruntime picks the CUDA provider on its own
+    when onnxruntime-gpu is installed.
+    """
+    global _rembg
+    with _rembg_lock:
+        if _rembg is None:
+            from rembg import new_session, remove
+            _rembg = (remove, new_session(REMBG_MODEL))
+        return _rembg
+
+
+def warm_rembg():
+    # Load the ONNX model off the request path so the first removal is not a cold start
+    if REMBG_AVAILABLE:
+        IO_EXECUTOR.submit(_rembg_session)
+
+
+def _remove_background(src: Path) -> Image.Image:
+    remove, session = _rembg_session()
+    return remove(Image.open(src), session=session)
+
+
 @app.post("/api/images/{image_id}/remove-background")
 async def remove_background(image_id: str):
-    db = load_db()
-    parent = next((r for r in db if r["id"] == image_id), None)
+    parent = IMAGE_STORE.get(image_id)
     if not parent:
         raise HTTPException(404, "Image not found")
 
@@ -1266,16 +2135,16 @@ async def remove_background(image_id: str):
     parent_size = parent.get("size", "1024x1024")
 
     # Use rembg for proper ML-based background removal
+    if not REMBG_AVAILABLE:
+        raise HTTPException(500, "Background removal failed: rembg is not installed")
     try:
-        from rembg import remove as rembg_remove
-        img = Image.open(file_path)
-        result_img = rembg_remove(img)
+        result_img = await run_blocking(_remove_background, file_path)
     except Exception as e:
         raise HTTPException(500, f"Background removal failed: {e}")
 
-    result_id = str(uuid.uuid4())
+    result_id = uuid.uuid4().hex
     result_filename = f"{result_id}.png"
-    result_img.save(str(IMAGES_DIR / result_filename), format="PNG")
+    await run_blocking(result_img.save, str(IMAGES_DIR / result_filename), format="PNG", **PNG_SAVE)
 
     record = {
         "id": result_id,
@@ -1287,9 +2156,7 @@ async def remove_background(image_id: str):
         "background_removed": True,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -1306,20 +2173,22 @@ async def prompt_history(limit: int = Query(default=50, ge=1, le=100)):
 
 @app.get("/api/prompts/suggestions")
 async def prompt_suggestions(q: str = Query(..., min_length=1)):
-    db = load_prompts_db()
     q_lower = q.lower()
     # Prefix match first, then substring match
     prefix_matches = []
     substring_matches = []
     seen = set()
-    for entry in db:
+    for entry in _prompt_history:
         p = entry["prompt"]
         if p in seen:
             continue
         seen.add(p)
-        if p.lower().startswith(q_lower):
+        p_lower = _lower_prompt(p)
+        if p_lower.startswith(q_lower):
             prefix_matches.append(entry)
-        elif q_lower in p.lower():
+            if len(prefix_matches) == 10:
+                break
+        elif q_lower in p_lower:
             substring_matches.append(entry)
     results = (prefix_matches + substring_matches)[:10]
     return {"suggestions": results}
@@ -1327,7 +2196,9 @@ async def prompt_suggestions(q: str = Query(..., min_length=1)):
 
 @app.delete("/api/prompts/history")
 async def clear_prompt_history():
-    save_prompts_db([])
+    _prompt_history.clear()
+    _prompt_last_seen.clear()
+    PROMPT_LOG.clear()
     return {"cleared": True}
 
 
@@ -1335,6 +2206,64 @@ async def clear_prompt_history():
 # Sprint 5: Style Transfer (#81)
 # ---------------------------------------------------------------------------
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB reads when streaming uploads to disk
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+async def _stream_upload(upload: UploadFile, dest: Path, limit: int = MAX_UPLOAD_BYTES, digest=None) -> int | None:
+    """Copy ``upload`` to ``dest`` chunk by chunk; return its size or None if over ``limit``.
+
+    ``digest`` (a hashlib object) is fed each chunk as it is written.
+    """
+    out = await run_blocking(open, dest, "wb")
+    written = 0
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > limit:
+                break
+            if digest is not None:
+                digest.update(chunk)
+            await run_blocking(out.write, chunk)
+    finally:
+        await run_blocking(out.close)
+    if written > limit:
+        await run_blocking(dest.unlink, missing_ok=True)
+        return None
+    return written
+
+
+STYLE_DESCRIPTION_CACHE_SIZE = 512
+
+# blake2b digest of the style image -> LLM style description, least recently used first
+_style_description_cache: OrderedDict[str, str] = OrderedDict()
+
+
+async def _describe_style(image_hash: str) -> str:
+    """Ask claude-haiku to describe the reference style, once per distinct image."""
+    description = _style_description_cache.get(image_hash)
+    if description is not None:
+        _style_description_cache.move_to_end(image_hash)
+        return description
+
+    try:
+        description = await run_blocking(
+            chat,
+            "Describe the artistic style of this image in detail. Focus on: color palette, brushwork/texture, lighting, mood, and artistic movement. Be concise (2-3 sentences).",
+            model="claude-haiku",
+            system="You are an art expert. Describe artistic styles concisely.",
+            max_tokens=200,
+            temperature=0.5,
+        )
+    except Exception:
+        return "artistic, stylized"  # not cached, so the next upload retries
+
+    _style_description_cache[image_hash] = description
+    if len(_style_description_cache) > STYLE_DESCRIPTION_CACHE_SIZE:
+        _style_description_cache.popitem(last=False)
+    return description
+
+
 @app.post("/api/generate-with-style")
 async def generate_with_style(
     prompt: str = Form(..., min_length=1, max_length=2000),
@@ -1352,29 +2281,16 @@ async def generate_with_style(
     if style_image.content_type not in ("image/png", "image/jpeg"):
         raise HTTPException(400, "Style image must be PNG or JPEG")
 
-    ref_data = await style_image.read()
-    if len(ref_data) > 10 * 1024 * 1024:
-        raise HTTPException(400, "Style image must be under 10MB")
-
-    # Save style reference
-    style_ref_id = str(uuid.uuid4())
+    # Stream the style reference to disk, rejecting it once it passes 10MB
+    style_ref_id = uuid.uuid4().hex
     ref_ext = "png" if style_image.content_type == "image/png" else "jpg"
     ref_filename = f"style_{style_ref_id}.{ref_ext}"
-    (IMAGES_DIR / ref_filename).write_bytes(ref_data)
+    digest = hashlib.blake2b(digest_size=16)
+    if await _stream_upload(style_image, IMAGES_DIR / ref_filename, digest=digest) is None:
+        raise HTTPException(400, "Style image must be under 10MB")
 
     # Use claude-haiku to analyze the style of the reference image
-    try:
-        # Encode image for analysis prompt
-        ref_b64 = base64.b64encode(ref_data).decode("utf-8")
-        style_description = chat(
-            "Describe the artistic style of this image in detail. Focus on: color palette, brushwork/texture, lighting, mood, and artistic movement. Be concise (2-3 sentences).",
-            model="claude-haiku",
-            system="You are an art expert. Describe artistic styles concisely.",
-            max_tokens=200,
-            temperature=0.5,
-        )
-    except Exception:
-        style_description = "artistic, stylized"
+    style_description = await _describe_style(digest.hexdigest())
 
     # Build prompt with style description, modulated by strength
     strength_word = "subtly" if strength < 0.4 else ("moderately" if strength < 0.7 else "strongly")
@@ -1385,7 +2301,7 @@ async def generate_with_style(
     save_prompt_history(prompt)
 
     try:
-        image_id, filename = _generate_single(generation_prompt, size)
+        image_id, filename = await run_blocking(_generate_single, generation_prompt, size)
     except Exception as e:
         raise HTTPException(500, f"Style transfer generation failed: {e}")
 
@@ -1401,9 +2317,7 @@ async def generate_with_style(
         "style_description": style_description,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db = load_db()
-    db.insert(0, record)
-    save_db(db)
+    IMAGE_STORE.insert(record)
 
     return record
 
@@ -1414,8 +2328,7 @@ async def generate_with_style(
 
 @app.get("/api/videos/{video_id}")
 async def get_video(video_id: str):
-    db = load_videos_db()
-    record = next((r for r in db if r["id"] == video_id), None)
+    record = VIDEO_STORE.get(video_id)
     if not record:
         raise HTTPException(404, "Video not found")
     return record
@@ -1423,27 +2336,22 @@ async def get_video(video_id: str):
 
 @app.delete("/api/videos/{video_id}")
 async def delete_video(video_id: str):
-    db = load_videos_db()
-    record = next((r for r in db if r["id"] == video_id), None)
+    record = VIDEO_STORE.get(video_id)
     if not record:
         raise HTTPException(404, "Video not found")
 
     # Delete file
     if record.get("filename"):
-        file_path = VIDEOS_DIR / record["filename"]
-        if file_path.exists():
-            file_path.unlink()
+        await run_blocking((VIDEOS_DIR / record["filename"]).unlink, missing_ok=True)
 
     # Remove from collections
-    coll_db = load_collections_db()
-    for c in coll_db:
+    for c in load_collections_db():
         if video_id in c.get("video_ids", []):
             c["video_ids"].remove(video_id)
-    save_collections_db(coll_db)
+            COLLECTION_STORE.update(c)
 
     # Remove from DB
-    db = [r for r in db if r["id"] != video_id]
-    save_videos_db(db)
+    VIDEO_STORE.delete(video_id)
 
     return {"id": video_id, "deleted": True}
 
@@ -1451,35 +2359,32 @@ async def delete_video(video_id: str):
 # Extend collections to support videos
 @app.post("/api/collections/{collection_id}/videos")
 async def add_video_to_collection(collection_id: str, req: CollectionItemRequest):
-    db = load_collections_db()
-    collection = next((c for c in db if c["id"] == collection_id), None)
+    collection = COLLECTION_STORE.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection not found")
 
     # Verify video exists
-    vid_db = load_videos_db()
-    video = next((r for r in vid_db if r["id"] == req.item_id), None)
+    video = VIDEO_STORE.get(req.item_id)
     if not video:
         raise HTTPException(404, "Video not found")
 
     video_ids = collection.setdefault("video_ids", [])
     if req.item_id not in video_ids:
         video_ids.append(req.item_id)
-        save_collections_db(db)
+        COLLECTION_STORE.update(collection)
 
     return {"collection_id": collection_id, "video_id": req.item_id, "added": True}
 
 
 @app.delete("/api/collections/{collection_id}/videos/{video_id}")
 async def remove_video_from_collection(collection_id: str, video_id: str):
-    db = load_collections_db()
-    collection = next((c for c in db if c["id"] == collection_id), None)
+    collection = COLLECTION_STORE.get(collection_id)
     if not collection:
         raise HTTPException(404, "Collection not found")
 
     if video_id in collection.get("video_ids", []):
         collection["video_ids"].remove(video_id)
-        save_collections_db(db)
+        COLLECTION_STORE.update(collection)
 
     return {"collection_id": collection_id, "video_id": video_id, "removed": True}
 
@@ -1488,7 +2393,7 @@ async def remove_video_from_collection(collection_id: str, video_id: str):
 # Sprint 6: Image Watermarking (#92)
 # ---------------------------------------------------------------------------
 
-class WatermarkRequest(BaseModel):
+class WatermarkRequest(RequestModel):
     text: str = Field(..., min_length=1, max_length=500)
     position: str = Field(default="bottom-right")
     opacity: float = Field(default=0.3, ge=0.1, le=1.0)
@@ -1496,21 +2401,30 @@ class WatermarkRequest(BaseModel):
     color: str = Field(default="#ffffff")
 
 
-@app.post("/api/images/{image_id}/watermark")
-async def watermark_image(image_id: str, req: WatermarkRequest):
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
-    if not record:
-        raise HTTPException(404, "Image not found")
+WATERMARK_POSITIONS = {"center", "bottom-right", "bottom-left", "top-right", "top-left", "tiled"}
 
-    filepath = IMAGES_DIR / record["filename"]
-    if not filepath.exists():
-        raise HTTPException(404, "Image file not found")
+# Common font paths across Linux and macOS
+WATERMARK_FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",       # Linux
+    "/System/Library/Fonts/Helvetica.ttc",                     # macOS
+    "/System/Library/Fonts/SFNSText.ttf",                     # macOS
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+]
+
+
+@lru_cache(maxsize=128)
+def _load_font(size: int) -> ImageFont.FreeTypeFont:
+    """First available watermark font at ``size``, falling back to Pillow's default."""
+    for fp in WATERMARK_FONT_PATHS:
+        try:
+            return ImageFont.truetype(fp, size)
+        except (OSError, IOError):
+            continue
+    return ImageFont.load_default(size=size)
 
-    valid_positions = {"center", "bottom-right", "bottom-left", "top-right", "top-left", "tiled"}
-    if req.position not in valid_positions:
-        raise HTTPException(400, f"Invalid position: {req.position}. Use: {valid_positions}")
 
+def _watermark_file(src: Path, dst: Path, req: WatermarkRequest) -> None:
+    """Render the requested text watermark onto ``src`` and save it to ``dst``."""
     # Parse hex color
     try:
         hex_color = req.color.lstrip("#")
@@ -1522,42 +2436,15 @@ async def watermark_image(image_id: str, req: WatermarkRequest):
 
     alpha = int(255 * req.opacity)
 
-    img = Image.open(filepath).convert("RGBA")
+    img = open_decoded(src, "RGBA")
     txt_layer = Image.new("RGBA", img.size, (0, 0, 0, 0))
     draw = ImageDraw.Draw(txt_layer)
 
-    # Try common font paths across Linux and macOS, fall back to default
-    font = None
-    font_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",       # Linux
-        "/System/Library/Fonts/Helvetica.ttc",                     # macOS
-        "/System/Library/Fonts/SFNSText.ttf",                     # macOS
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-    ]
-    for fp in font_paths:
-        try:
-            font = ImageFont.truetype(fp, req.font_size)
-            break
-        except (OSError, IOError):
-            continue
-    if font is None:
-        font = ImageFont.load_default(size=req.font_size)
-
     # Scale font size relative to image width so watermark is always visible
     # User's font_size is treated as a base for a 1024px-wide image
     scale_factor = img.width / 1024.0
     actual_font_size = max(int(req.font_size * scale_factor), 16)
-
-    # Re-load font at scaled size
-    font = None
-    for fp in font_paths:
-        try:
-            font = ImageFont.truetype(fp, actual_font_size)
-            break
-        except (OSError, IOError):
-            continue
-    if font is None:
-        font = ImageFont.load_default(size=actual_font_size)
+    font = _load_font(actual_font_size)
 
     bbox = draw.textbbox((0, 0), req.text, font=font)
     text_w = bbox[2] - bbox[0]
@@ -1576,15 +2463,18 @@ async def watermark_image(image_id: str, req: WatermarkRequest):
         d.text(pos, text, font=font, fill=fill)
 
     if req.position == "tiled":
-        # Tile the watermark at 45 degrees across the image
+        # Tile the watermark on one canvas covering the image's diagonal, then
+        # rotate it 45 degrees once and crop back to the image
         import math
-        for y in range(-img.height, img.height * 2, text_h + 80):
-            for x in range(-img.width, img.width * 2, text_w + 80):
-                tile_layer = Image.new("RGBA", img.size, (0, 0, 0, 0))
-                tile_draw = ImageDraw.Draw(tile_layer)
+        side = math.ceil(math.hypot(img.width, img.height))
+        tiles = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+        tile_draw = ImageDraw.Draw(tiles)
+        for y in range(0, side, text_h + 80):
+            for x in range(0, side, text_w + 80):
                 _draw_text_with_shadow(tile_draw, (x, y), req.text)
-                tile_layer = tile_layer.rotate(45, center=(img.width // 2, img.height // 2), expand=False)
-                txt_layer = Image.alpha_composite(txt_layer, tile_layer)
+        left = (side - img.width) // 2
+        top = (side - img.height) // 2
+        txt_layer = tiles.rotate(45).crop((left, top, left + img.width, top + img.height))
     else:
         positions = {
             "center": ((img.width - text_w) // 2, (img.height - text_h) // 2),
@@ -1598,11 +2488,25 @@ async def watermark_image(image_id: str, req: WatermarkRequest):
 
     watermarked = Image.alpha_composite(img, txt_layer)
     watermarked_rgb = watermarked.convert("RGB")
+    watermarked_rgb.save(dst, "PNG", **PNG_SAVE)
+
 
-    new_id = str(uuid.uuid4())
+@app.post("/api/images/{image_id}/watermark")
+async def watermark_image(image_id: str, req: WatermarkRequest):
+    record = IMAGE_STORE.get(image_id)
+    if not record:
+        raise HTTPException(404, "Image not found")
+
+    filepath = IMAGES_DIR / record["filename"]
+    if not filepath.exists():
+        raise HTTPException(404, "Image file not found")
+
+    if req.position not in WATERMARK_POSITIONS:
+        raise HTTPException(400, f"Invalid position: {req.position}. Use: {WATERMARK_POSITIONS}")
+
+    new_id = uuid.uuid4().hex
     new_filename = f"{new_id}.png"
-    new_path = IMAGES_DIR / new_filename
-    watermarked_rgb.save(new_path, "PNG")
+    await run_blocking(_watermark_file, filepath, IMAGES_DIR / new_filename, req)
 
     new_record = {
         "id": new_id,
@@ -1617,8 +2521,7 @@ async def watermark_image(image_id: str, req: WatermarkRequest):
         "watermark_opacity": req.opacity,
         "created_at": datetime.utcnow().isoformat(),
     }
-    db.append(new_record)
-    save_db(db)
+    IMAGE_STORE.append(new_record)
 
     return new_record
 
@@ -1631,6 +2534,10 @@ async def watermark_image(image_id: str, req: WatermarkRequest):
 # Sprint 7: Text-in-Image prompt helper
 # ---------------------------------------------------------------------------
 
+TEXT_OVERLAY_FONTS = {"bold", "handwritten", "3d", "graffiti", "serif", "sans-serif", "decorative"}
+TEXT_OVERLAY_PLACEMENTS = {"center", "top", "bottom"}
+
+
 def _apply_text_overlay(prompt: str, text_overlay: dict | None) -> str:
     """Append text rendering instructions to the prompt."""
     if not text_overlay:
@@ -1641,10 +2548,8 @@ def _apply_text_overlay(prompt: str, text_overlay: dict | None) -> str:
     font_hint = text_overlay.get("font_hint", "bold")
     placement = text_overlay.get("placement", "center")
 
-    valid_fonts = {"bold", "handwritten", "3d", "graffiti", "serif", "sans-serif", "decorative"}
-    valid_placements = {"center", "top", "bottom"}
-    font_hint = font_hint if font_hint in valid_fonts else "bold"
-    placement = placement if placement in valid_placements else "center"
+    font_hint = font_hint if font_hint in TEXT_OVERLAY_FONTS else "bold"
+    placement = placement if placement in TEXT_OVERLAY_PLACEMENTS else "center"
 
     text_instruction = (
         f', with the text "{text}" prominently displayed in {font_hint} lettering '
@@ -1657,13 +2562,47 @@ def _apply_text_overlay(prompt: str, text_overlay: dict | None) -> str:
 # Sprint 8: SVG/Vector Export
 # ---------------------------------------------------------------------------
 
+def _file_digest(path: Path) -> str:
+    """Hex blake2b digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+async def _trace_svg(src_path: Path, svg_path: Path) -> None:
+    """Vectorize ``src_path`` into ``svg_path`` with vtracer."""
+    import vtracer
+
+    # Trace into a private temp file so concurrent exports of the same source
+    # never serve a half-written SVG. vtracer holds the GIL for the whole
+    # trace, so run it in a worker process rather than on the shared thread pool
+    tmp_path = svg_path.with_name(f"{svg_path.name}.{uuid.uuid4().hex}.tmp")
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(CPU_EXECUTOR, partial(
+            vtracer.convert_image_to_svg_py,
+            str(src_path),
+            str(tmp_path),
+            colormode="color",
+            hierarchical="stacked",
+            mode="polygon",
+            filter_speckle=4,
+            color_precision=6,
+            layer_difference=16,
+            corner_threshold=60,
+            length_threshold=4.0,
+            max_iterations=10,
+            splice_threshold=45,
+            path_precision=3,
+        ))
+        os.replace(tmp_path, svg_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 @app.post("/api/images/{image_id}/export-svg")
 async def export_svg(image_id: str):
     """Convert a raster image to SVG using vtracer vectorization."""
-    import vtracer
-
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
+    record = IMAGE_STORE.get(image_id)
     if not record:
         raise HTTPException(404, "Image not found")
 
@@ -1671,35 +2610,27 @@ async def export_svg(image_id: str):
     if not src_path.exists():
         raise HTTPException(404, "Image file not found on disk")
 
-    svg_filename = f"{image_id}.svg"
-    svg_path = IMAGES_DIR / svg_filename
-
-    # Convert to SVG using vtracer
-    vtracer.convert_image_to_svg_py(
-        str(src_path),
-        str(svg_path),
-        colormode="color",
-        hierarchical="stacked",
-        mode="polygon",
-        filter_speckle=4,
-        color_precision=6,
-        layer_difference=16,
-        corner_threshold=60,
-        length_threshold=4.0,
-        max_iterations=10,
-        splice_threshold=45,
-        path_precision=3,
-    )
-
-    # Update record with svg info
-    record["svg_filename"] = svg_filename
-    save_db(db)
-
+    # Image files are never rewritten once stored, so an SVG traced earlier for
+    # this record, or for a byte-identical source, can be served as is
+    svg_filename = record.get("svg_filename")
+    if not svg_filename or not (IMAGES_DIR / svg_filename).exists():
+        source_hash = record.get("source_hash") or await run_blocking(_file_digest, src_path)
+        svg_filename = f"svg_{source_hash}.svg"
+        svg_path = IMAGES_DIR / svg_filename
+        if not svg_path.exists():
+            await _trace_svg(src_path, svg_path)
+
+        # Update record with svg info
+        record["source_hash"] = source_hash
+        record["svg_filename"] = svg_filename
+        IMAGE_STORE.update(record)
+
+    download_name = f"{image_id}.svg"
     return FileResponse(
-        str(svg_path),
+        str(IMAGES_DIR / svg_filename),
         media_type="image/svg+xml",
-        filename=svg_filename,
-        headers={"Content-Disposition": f'attachment; filename="{svg_filename}"'},
+        filename=download_name,
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
     )
 
 
@@ -1707,6 +2638,9 @@ async def export_svg(image_id: str):
 # Sprint 8: Smart Object Replacement
 # ---------------------------------------------------------------------------
 
+PRESERVE_STYLE_INSTRUCTION = " Maintain the exact same artistic style, lighting, color palette, and composition."
+
+
 @app.post("/api/images/{image_id}/replace-object")
 async def replace_object(
     image_id: str,
@@ -1720,8 +2654,7 @@ async def replace_object(
     if not replacement.strip():
         raise HTTPException(400, "replacement cannot be empty")
 
-    db = load_db()
-    record = next((r for r in db if r["id"] == image_id), None)
+    record = IMAGE_STORE.get(image_id)
     if not record:
         raise HTTPException(404, "Image not found")
 
@@ -1732,34 +2665,28 @@ async def replace_object(
         raise HTTPException(404, "Source image file not found")
 
     # Build an edit prompt that tells the model what to replace
-    style_instruction = " Maintain the exact same artistic style, lighting, color palette, and composition." if preserve_style else ""
+    style_instruction = PRESERVE_STYLE_INSTRUCTION if preserve_style else ""
     edit_prompt = f"Replace '{target_object}' with '{replacement}' in this image, keeping everything else exactly the same.{style_instruction}"
 
-    new_id = str(uuid.uuid4())
+    new_id = uuid.uuid4().hex
     filename = f"{new_id}.png"
     file_path = IMAGES_DIR / filename
 
     # Use image edit API so the model sees the actual source image
-    IMAGE_MODELS_EDIT = ["gpt-image"]  # edit_image only works with gpt-image
-    last_error = None
-    for model in IMAGE_MODELS_EDIT:
-        try:
-            edit_image(
-                image_path=str(source_path),
-                prompt=edit_prompt,
-                model=model,
-                size=original_size,
-                output=str(file_path),
-            )
-            break
-        except Exception as e:
-            last_error = e
-            continue
-    else:
-        raise HTTPException(500, f"Object replacement failed: {last_error}")
+    try:
+        await run_blocking(
+            edit_image,
+            image_path=str(source_path),
+            prompt=edit_prompt,
+            model="gpt-image",  # edit_image only works with gpt-image
+            size=original_size,
+            output=str(file_path),
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Object replacement failed: {e}")
 
     try:
-        postprocess_image(str(file_path), original_size)
+        await run_blocking(postprocess_image, str(file_path), original_size)
     except Exception:
         pass
 
@@ -1777,8 +2704,7 @@ async def replace_object(
         "replacement": replacement,
     }
 
-    db.append(new_record)
-    save_db(db)
+    IMAGE_STORE.append(new_record)
     return new_record
 
 
@@ -1800,40 +2726,109 @@ LANGUAGE_HINTS = {
 }
 
 
+# Buckets returned by _script_bucket, in LANGUAGE_HINTS naming
+_SCRIPT_BUCKETS = (None, "latin", "cjk", "arabic", "hindi", "korean", "thai")
+RTL_SCRIPTS = frozenset({"arabic"})
+
+
+def _script_bucket(cp: int) -> int:
+    """Index into _SCRIPT_BUCKETS for one codepoint (0 for non-letters)."""
+    ch = chr(cp)
+    if not unicodedata.category(ch).startswith("L"):
+        return 0
+    name = unicodedata.name(ch, "")
+    if "CJK" in name or "HIRAGANA" in name or "KATAKANA" in name:
+        return 2
+    if "ARABIC" in name:
+        return 3
+    if "DEVANAGARI" in name:
+        return 4
+    if "HANGUL" in name:
+        return 5
+    if "THAI" in name:
+        return 6
+    return 1
+
+
+@lru_cache(maxsize=1)
+def _script_tables() -> tuple[np.ndarray, np.ndarray]:
+    """Two-stage bucket table: ``stage2[stage1[cp >> 8] << 8 | cp & 0xFF]``.
+
+    stage1 maps each 256-codepoint block to one of the distinct block tables
+    concatenated in stage2 (119 for all of Unicode), so a lookup is two
+    indexings. Derived from unicodedata once (~0.2s), on first use rather
+    than at import.
+    """
+    block_ids: dict[bytes, int] = {}
+    stage1 = bytearray()
+    for base in range(0, sys.maxunicode + 1, 256):
+        block = bytes(_script_bucket(cp) for cp in range(base, base + 256))
+        stage1.append(block_ids.setdefault(block, len(block_ids)))
+    return np.frombuffer(bytes(stage1), dtype=np.uint8), np.frombuffer(b"".join(block_ids), dtype=np.uint8)
+
+
+DETECT_SCRIPT_MAX_CHARS = 65536  # longer inputs are rejected by the endpoint
+DETECT_SCRIPT_CACHE_MAX_CHARS = 4096  # longer texts are classified without caching
+
+
 def _detect_script(text: str) -> str:
     """Auto-detect script category from Unicode character analysis."""
-    counts: dict[str, int] = {}
-    for ch in text:
-        cat = unicodedata.category(ch)
-        if cat.startswith("L"):
-            try:
-                name = unicodedata.name(ch, "")
-            except ValueError:
-                name = ""
-            if "CJK" in name or "HIRAGANA" in name or "KATAKANA" in name:
-                counts["cjk"] = counts.get("cjk", 0) + 1
-            elif "ARABIC" in name:
-                counts["arabic"] = counts.get("arabic", 0) + 1
-            elif "DEVANAGARI" in name:
-                counts["hindi"] = counts.get("hindi", 0) + 1
-            elif "HANGUL" in name:
-                counts["korean"] = counts.get("korean", 0) + 1
-            elif "THAI" in name:
-                counts["thai"] = counts.get("thai", 0) + 1
-            else:
-                counts["latin"] = counts.get("latin", 0) + 1
-    if not counts:
+    # Every letter in Latin-1 is in the latin bucket, and text without letters
+    # also reports latin; isascii() is O(1) on CPython, max() a C-level scan
+    if text.isascii() or max(text, default="\0") < "\u0100":
+        return "latin"
+    if len(text) <= DETECT_SCRIPT_CACHE_MAX_CHARS:
+        return _detect_script_cached(text)
+    return _detect_script_uncached(text)
+
+
+@lru_cache(maxsize=4096)
+def _detect_script_cached(text: str) -> str:
+    # Clients re-probe the same text while the user types
+    return _detect_script_uncached(text)
+
+
+SCRIPT_SCAN_CHUNK = 4096  # codepoints classified per step before checking for a decided winner
+
+
+def _detect_script_uncached(text: str) -> str:
+    stage1, stage2 = _script_tables()
+    counts = np.zeros(len(_SCRIPT_BUCKETS), dtype=np.int64)
+    scanned = []
+    for start in range(0, len(text), SCRIPT_SCAN_CHUNK):
+        # Classify a whole chunk at once from a UTF-32 view of the string
+        chunk = text[start:start + SCRIPT_SCAN_CHUNK].encode("utf-32-le", "surrogatepass")
+        cps = np.frombuffer(chunk, dtype=np.uint32)
+        buckets = stage2[stage1[cps >> 8].astype(np.uint32) << 8 | cps & 0xFF]
+        scanned.append(buckets)
+        counts += np.bincount(buckets, minlength=len(_SCRIPT_BUCKETS))
+        counts[0] = 0  # non-letters
+        remaining = len(text) - start - SCRIPT_SCAN_CHUNK
+        if remaining > 0:
+            runner_up, leader = np.sort(counts)[-2:]
+            if leader - runner_up > remaining:
+                break  # the rest of the text can no longer change the winner
+    best = counts.max()
+    if not best:
         return "latin"
-    return max(counts, key=lambda k: counts[k])
+    winners = np.flatnonzero(counts == best)
+    if len(winners) > 1:
+        # Ties go to the script seen first, as with the per-character count
+        buckets = np.concatenate(scanned)
+        winners = sorted(winners, key=lambda w: np.argmax(buckets == w))
+    return _SCRIPT_BUCKETS[winners[0]]
 
 
 @app.post("/api/detect-script")
 async def detect_script_endpoint(text: str = Form(...)):
     """Detect script of input text."""
-    if not text.strip():
+    # isspace() stops at the first non-space instead of copying like strip()
+    if not text or text.isspace():
         raise HTTPException(400, "Text cannot be empty")
+    if len(text) > DETECT_SCRIPT_MAX_CHARS:
+        raise HTTPException(413, f"Text must be at most {DETECT_SCRIPT_MAX_CHARS} characters")
     detected = _detect_script(text)
-    direction = "rtl" if detected == "arabic" else "ltr"
+    direction = "rtl" if detected in RTL_SCRIPTS else "ltr"
     return {"text": text, "detected_script": detected, "direction": direction}
 
 
@@ -688,7 +688,7 @@ export default function Home() {
     setInpainting(true);
     setError("");
 
-    // Export mask as base64 PNG — convert to black/white mask
+    // Export mask as a PNG blob — convert to black/white mask
     const canvas = canvasRef.current;
     const ctx = canvas.getContext("2d");
     if (!ctx) return;
@@ -707,10 +707,13 @@ export default function Home() {
       maskData.data[i + 3] = 255;
     }
     maskCtx.putImageData(maskData, 0, 0);
-    const maskBase64 = maskCanvas.toDataURL("image/png").split(",")[1];
+    const maskBlob = await new Promise<Blob | null>((resolve) =>
+      maskCanvas.toBlob(resolve, "image/png")
+    );
 
     try {
-      const inpainted = await inpaintImage(result.id, maskBase64, inpaintPrompt);
+      if (!maskBlob) throw new Error("Failed to export mask");
+      const inpainted = await inpaintImage(result.id, maskBlob, inpaintPrompt);
       setResult(inpainted);
       setInpaintMode(false);
       setInpaintPrompt("");
@@ -24,6 +24,7 @@ export interface ImageRecord {
   inpainted?: boolean;
   upscaled?: boolean;
   upscale_factor?: number;
+  upscale_algo?: UpscaleAlgo;
   background_removed?: boolean;
   style_transfer?: boolean;
   created_at: string;
@@ -147,13 +148,17 @@ export function getDownloadUrl(imageId: string, format: string = "png"): string
 
 export async function inpaintImage(
   imageId: string,
-  mask: string,
+  mask: Blob,
   prompt: string
 ): Promise<ImageRecord> {
-  const res = await fetch(`${API_URL}/api/inpaint`, {
+  const formData = new FormData();
+  formData.append("image_id", imageId);
+  formData.append("prompt", prompt);
+  formData.append("mask", mask, "mask.png");
+
+  const res = await fetch(`${API_URL}/api/inpaint/upload`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ image_id: imageId, mask, prompt }),
+    body: formData,
   });
   if (!res.ok) {
     const err = await res.json().catch(() => ({ detail: "Inpainting failed" }));
@@ -162,14 +167,17 @@ export async function inpaintImage(
   return res.json();
 }
 
+export type UpscaleAlgo = "lanczos" | "bicubic" | "nearest";
+
 export async function upscaleImage(
   imageId: string,
-  scale: number = 2
+  scale: number = 2,
+  algo: UpscaleAlgo = "lanczos"
 ): Promise<ImageRecord> {
   const res = await fetch(`${API_URL}/api/upscale`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ image_id: imageId, scale }),
+    body: JSON.stringify({ image_id: imageId, scale, algo }),
   });
   if (!res.ok) {
     const err = await res.json().catch(() => ({ detail: "Upscale failed" }));
@@ -39,6 +39,7 @@ Usage:
 
 import time
 import requests
+from io import BytesIO
 from pathlib import Path
 
 from utils.litellm_client import get_headers, api_url, resolve_model
@@ -57,6 +58,7 @@ def submit_video(
     seconds: int = 8,
     image_path: str | None = None,
     timeout: int = 300,
+    image_bytes: bytes | None = None,
 ) -> str:
     """
     Submit a video generation request (non-blocking).
@@ -68,6 +70,7 @@ def submit_video(
         seconds:    Video duration in seconds (max 8).
         image_path: Optional path to a source image for image-to-video.
         timeout:    Request timeout in seconds.
+        image_bytes: Optional in-memory PNG source image, used instead of image_path.
 
     Returns:
         The video_id string for polling and download.
@@ -90,13 +93,16 @@ def submit_video(
 
     auth_header = {"Authorization": get_headers()["Authorization"]}
 
-    if image_path:
+    if image_path or image_bytes:
         # Image-to-video: use multipart/form-data with input_reference
-        import mimetypes
-        mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
-        files = {
-            "input_reference": (Path(image_path).name, open(image_path, "rb"), mime_type),
-        }
+        if image_bytes is not None:
+            files = {"input_reference": ("input.png", BytesIO(image_bytes), "image/png")}
+        else:
+            import mimetypes
+            mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+            files = {
+                "input_reference": (Path(image_path).name, open(image_path, "rb"), mime_type),
+            }
         data = {
             "model": model_id,
             "prompt": prompt,